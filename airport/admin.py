@@ -9,6 +9,7 @@ from .models import (
     Route,
     Flight,
     Ticket,
+    SeatHold,
 )
 
 admin.site.register(Crew)
@@ -19,3 +20,4 @@ admin.site.register(Airport)
 admin.site.register(Route)
 admin.site.register(Flight)
 admin.site.register(Ticket)
+admin.site.register(SeatHold)
@@ -0,0 +1,303 @@
+"""
+Native async read endpoints for flights and reference data.
+
+These views run on the event loop when the project is served through
+ASGI and read with Django's async ORM. Blocking work (token validation,
+cache access and serialization) runs in a bounded thread pool of
+ASYNC_BLOCKING_WORKERS threads. Requests are throttled like those of the
+matching DRF viewset, responses have the same item representation and
+are paginated with an opaque ``cursor`` over the same ordering.
+"""
+import asyncio
+import base64
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import F, Q
+from django.http import HttpResponse, JsonResponse
+from django.utils.http import urlencode
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    NotFound,
+    Throttled,
+)
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from airport.cache import (
+    compute_etag,
+    get_cache,
+    list_cache_key,
+    not_modified,
+    seat_map_etag,
+)
+from airport.models import Airport, Flight, Route
+from airport.pagination import DefaultCursorPagination, FlightCursorPagination
+from airport.serializers import (
+    AirportSerializer,
+    FlightListSerializer,
+    FlightSeatMapSerializer,
+    FlightSerializer,
+    RouteSerializer,
+)
+from airport.views import AirportViewSet, FlightViewSet, RouteViewSet
+from airport_service.metrics import registry
+from user.authentication import claims_user
+
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "ASYNC_BLOCKING_WORKERS", 8),
+    thread_name_prefix="airport-async",
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call in the bounded thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+async def authenticate(request):
+    """Authenticate the request with its JWT access token.
+
+    The views only read, so the user is built from the token's claims
+    when it has them.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        raise NotAuthenticated()
+    token = await run_blocking(authentication.get_validated_token, raw_token)
+    user = claims_user(token)
+    if user is not None:
+        return user
+    try:
+        user_id = token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(
+            "Token contained no recognizable user identification"
+        )
+    try:
+        user = await get_user_model().objects.aget(
+            **{api_settings.USER_ID_FIELD: user_id}
+        )
+    except get_user_model().DoesNotExist:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    return user
+
+
+def check_throttles(request, viewset) -> None:
+    """Apply the throttles of ``viewset`` as APIView.check_throttles
+    does."""
+    view = viewset()
+    durations = [
+        throttle.wait() for throttle in view.get_throttles()
+        if not throttle.allow_request(request, view)
+    ]
+    if durations:
+        durations = [
+            duration for duration in durations if duration is not None
+        ]
+        raise Throttled(wait=max(durations, default=None))
+
+
+def async_api_view(viewset):
+    """Authenticate the user, apply the throttles of the DRF viewset
+    serving the same data and render API exceptions as JSON."""
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != "GET":
+                return JsonResponse(
+                    {"detail": f'Method "{request.method}" not allowed.'},
+                    status=status.HTTP_405_METHOD_NOT_ALLOWED,
+                )
+            try:
+                try:
+                    request.user = await authenticate(request)
+                except NotAuthenticated:
+                    # Requests without a token count against the anon rate.
+                    request.user = AnonymousUser()
+                    await run_blocking(check_throttles, request, viewset)
+                    raise
+                await run_blocking(check_throttles, request, viewset)
+                return await view(request, *args, **kwargs)
+            except APIException as exc:
+                detail = exc.detail
+                if not isinstance(detail, (dict, list)):
+                    detail = {"detail": detail}
+                response = JsonResponse(
+                    detail, status=exc.status_code, safe=False
+                )
+                if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                    response["WWW-Authenticate"] = (
+                        JWTAuthentication().authenticate_header(request)
+                    )
+                    response.status_code = status.HTTP_401_UNAUTHORIZED
+                if getattr(exc, "wait", None):
+                    response["Retry-After"] = "%d" % exc.wait
+                return response
+
+        return wrapper
+
+    return decorator
+
+
+def _encode_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _decode_cursor(cursor, size) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise NotFound("Invalid cursor")
+    return values
+
+
+def _cursor_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+async def paginate(request, queryset, pagination_class, serializer_class):
+    """Return a keyset page of ``queryset`` as {"next", "results"}."""
+    ordering = pagination_class.ordering
+    try:
+        page_size = min(
+            int(request.GET[pagination_class.page_size_query_param]),
+            pagination_class.max_page_size,
+        )
+    except (KeyError, ValueError):
+        page_size = pagination_class.page_size
+    if page_size < 1:
+        page_size = pagination_class.page_size
+
+    cursor = request.GET.get("cursor")
+    if cursor:
+        values = _decode_cursor(cursor, len(ordering))
+        after = None
+        for name, value in reversed(list(zip(ordering, values))):
+            condition = Q(**{f"{name}__gt": value})
+            if after is not None:
+                condition |= Q(**{name: value}) & after
+            after = condition
+        queryset = queryset.filter(after)
+
+    items = [
+        item async for item in queryset.order_by(*ordering)[:page_size + 1]
+    ]
+    next_url = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        params = request.GET.copy()
+        params["cursor"] = _encode_cursor([
+            _cursor_value(getattr(items[-1], name)) for name in ordering
+        ])
+        next_url = request.build_absolute_uri(
+            f"{request.path}?{urlencode(params, doseq=True)}"
+        )
+
+    results = await run_blocking(
+        lambda: serializer_class(items, many=True).data
+    )
+    return {"next": next_url, "results": results}
+
+
+async def cached_list(request, model, serializer_class):
+    """Reference data page, cached like the CachedListMixin responses."""
+    cache = get_cache()
+    key = await run_blocking(
+        list_cache_key, model, request.build_absolute_uri()
+    )
+    cached = await run_blocking(cache.get, key)
+    registry.record_cache(hit=cached is not None)
+    if cached is None:
+        data = await paginate(
+            request,
+            model.objects.all(),
+            DefaultCursorPagination,
+            serializer_class,
+        )
+        cached = (data, compute_etag(data))
+        await run_blocking(
+            cache.set,
+            key,
+            cached,
+            getattr(settings, "AIRPORT_CACHE_TIMEOUT", 300),
+        )
+    data, etag = cached
+    if not_modified(request, etag):
+        return HttpResponse(
+            status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return JsonResponse(data, headers={"ETag": etag})
+
+
+@async_api_view(AirportViewSet)
+async def airport_list(request):
+    return await cached_list(request, Airport, AirportSerializer)
+
+
+@async_api_view(RouteViewSet)
+async def route_list(request):
+    return await cached_list(request, Route, RouteSerializer)
+
+
+@async_api_view(FlightViewSet)
+async def flight_list(request):
+    queryset = FlightViewSet.filter_by_params(Flight.objects, request.GET)
+    capacity = F("airplane__rows") * F("airplane__seats_in_row")
+    queryset = queryset.annotate(
+        capacity=capacity,
+        tickets_available=capacity - F("seats_sold"),
+    )
+    data = await paginate(
+        request, queryset, FlightCursorPagination, FlightListSerializer
+    )
+    return JsonResponse(data)
+
+
+@async_api_view(FlightViewSet)
+async def flight_detail(request, pk):
+    try:
+        flight = await Flight.objects.aget(pk=pk)
+    except Flight.DoesNotExist:
+        raise NotFound()
+    return JsonResponse(FlightSerializer(flight).data)
+
+
+@async_api_view(FlightViewSet)
+async def flight_seats(request, pk):
+    try:
+        flight = await Flight.objects.select_related("airplane").only(
+            "occupied_seats",
+            "airplane__rows",
+            "airplane__seats_in_row",
+        ).aget(pk=pk)
+    except Flight.DoesNotExist:
+        raise NotFound()
+    airplane = flight.airplane
+    etag = seat_map_etag(
+        airplane.rows, airplane.seats_in_row, bytes(flight.seat_map)
+    )
+    if not_modified(request, etag):
+        return HttpResponse(
+            status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return JsonResponse(
+        FlightSeatMapSerializer(flight).data, headers={"ETag": etag}
+    )
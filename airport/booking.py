@@ -0,0 +1,295 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+
+from airport.models import Flight, Order, SeatHold, Ticket
+from airport.seats import SeatMap
+
+BOOKING_ATTEMPTS = 3
+
+
+def lock_flights(flight_ids) -> dict:
+    """Lock the given flights in a stable order and return them by id."""
+    flights = (
+        Flight.objects.select_for_update(of=("self",)).
+        select_related("airplane").
+        filter(pk__in=flight_ids).
+        order_by("pk")
+    )
+    return {flight.id: flight for flight in flights}
+
+
+def held_places(tickets_data) -> dict:
+    """Return the user ids holding the requested places, by (flight id,
+    row, seat)."""
+    requested = {
+        (data["flight"].id, data["row"], data["seat"])
+        for data in tickets_data
+    }
+    holds = SeatHold.objects.filter(
+        flight_id__in={flight_id for flight_id, _, _ in requested},
+        row__in={row for _, row, _ in requested},
+        seat__in={seat for _, _, seat in requested},
+        expires_at__gt=timezone.now(),
+    ).values_list("flight_id", "row", "seat", "user_id")
+    return {
+        (flight_id, row, seat): user_id
+        for flight_id, row, seat, user_id in holds
+        if (flight_id, row, seat) in requested
+    }
+
+
+def book_tickets(order, tickets_data) -> list:
+    """Validate all requested seats at once and insert them in one batch.
+
+    Must be called inside a transaction: the flights are locked until it
+    commits so that concurrent orders cannot take the same seats. Seats
+    held by other users are rejected.
+    """
+    flights = lock_flights({data["flight"].id for data in tickets_data})
+    held = held_places(tickets_data)
+
+    errors = []
+    requested = set()
+    for data in tickets_data:
+        flight = flights[data["flight"].id]
+        place = (flight.id, data["row"], data["seat"])
+        error = Ticket.validate_ticket(data["row"], data["seat"], flight)
+        if not error and place in requested:
+            error = {
+                "seat_duplicate": (
+                    f"The place 'seat: {data['seat']}, row: {data['row']}' "
+                    f"is requested more than once."
+                )
+            }
+        if not error and held.get(place, order.user_id) != order.user_id:
+            error = {
+                "seat_held": (
+                    f"The place 'seat: {data['seat']}, row: {data['row']}' "
+                    f"is held by someone else."
+                )
+            }
+        requested.add(place)
+        errors.append(error)
+    if any(errors):
+        raise ValidationError({"tickets": errors})
+
+    tickets = issue_tickets(order, tickets_data, flights)
+    if held:
+        # The buyer's own holds on the booked seats are used up.
+        places = Q()
+        for flight_id, row, seat in held:
+            places |= Q(flight_id=flight_id, row=row, seat=seat)
+        SeatHold.objects.filter(places, user_id=order.user_id).delete()
+    return tickets
+
+
+def issue_tickets(order, tickets_data, flights) -> list:
+    """Insert the tickets and mark their seats on the locked flights."""
+    tickets = Ticket.objects.bulk_create(
+        [Ticket(order=order, **data) for data in tickets_data]
+    )
+    for flight in flights.values():
+        seat_map = flight.seat_map
+        sold = 0
+        for data in tickets_data:
+            if data["flight"].id == flight.id:
+                seat_map.occupy(data["row"], data["seat"])
+                sold += 1
+        Flight.objects.filter(pk=flight.id).update(
+            occupied_seats=bytes(seat_map),
+            seats_sold=F("seats_sold") + sold,
+        )
+    return tickets
+
+
+def reconcile_flights(queryset, batch_size=500) -> int:
+    """Recount seats_sold and rebuild seat bitmaps from the tickets.
+
+    Flights are processed in primary key batches so that each batch costs
+    two reads and one bulk update regardless of the table size. Each batch
+    is locked like lock_flights does, so bookings committed meanwhile are
+    counted rather than overwritten. Returns the number of flights that
+    had to be corrected.
+    """
+    queryset = queryset.select_for_update(of=("self",)).select_related(
+        "airplane"
+    ).order_by("pk")
+    corrected = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=queryset.db):
+            flights = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not flights:
+                return corrected
+            last_pk = flights[-1].pk
+
+            seat_maps = {}
+            for flight in flights:
+                airplane = flight.airplane
+                seat_maps[flight.id] = SeatMap(
+                    airplane.rows, airplane.seats_in_row
+                )
+            sold = dict.fromkeys(seat_maps, 0)
+            # Read once the flights are locked, bookings of these flights
+            # either committed before or wait for this batch.
+            tickets = Ticket.objects.using(queryset.db).filter(
+                flight_id__in=list(seat_maps)
+            ).values_list("flight_id", "row", "seat")
+            for flight_id, row, seat in tickets:
+                sold[flight_id] += 1
+                if seat_maps[flight_id].contains(row, seat):
+                    seat_maps[flight_id].occupy(row, seat)
+
+            changed = []
+            for flight in flights:
+                occupied_seats = bytes(seat_maps[flight.id])
+                if (
+                    flight.seats_sold != sold[flight.id]
+                    or bytes(flight.occupied_seats) != occupied_seats
+                ):
+                    flight.seats_sold = sold[flight.id]
+                    flight.occupied_seats = occupied_seats
+                    changed.append(flight)
+            Flight.objects.using(queryset.db).bulk_update(
+                changed, ["seats_sold", "occupied_seats"]
+            )
+            corrected += len(changed)
+
+
+def create_order(tickets_data, **order_data) -> Order:
+    """Create an order with its tickets, retrying on booking conflicts.
+
+    A conflict is either a violated ticket uniqueness constraint or a lock
+    the database could not grant. Each retry starts a fresh transaction,
+    so the seats are re-validated against the committed state.
+    """
+    for attempt in range(1, BOOKING_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                order = Order.objects.create(**order_data)
+                book_tickets(order, tickets_data)
+                return order
+        except (IntegrityError, OperationalError):
+            if attempt == BOOKING_ATTEMPTS:
+                raise ValidationError(
+                    "The places are being booked by someone else, "
+                    "please try again."
+                )
+            time.sleep(random.uniform(0, 0.05 * attempt))
+
+
+def hold_seats(user, flight, seats, minutes) -> dict:
+    """Hold the (row, seat) places of a flight for the user.
+
+    The holds are inserted at once, the unique constraint on their places
+    decides between concurrent requests without locking the flight.
+    Expired holds and the user's own holds on the places are replaced.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(minutes=minutes)
+    reference = uuid.uuid4()
+    places = Q()
+    for row, seat in seats:
+        places |= Q(row=row, seat=seat)
+    try:
+        with transaction.atomic():
+            SeatHold.objects.filter(
+                places,
+                Q(expires_at__lte=now) | Q(user=user),
+                flight=flight,
+            ).delete()
+            SeatHold.objects.bulk_create([
+                SeatHold(
+                    flight=flight,
+                    row=row,
+                    seat=seat,
+                    user=user,
+                    reference=reference,
+                    expires_at=expires_at,
+                )
+                for row, seat in seats
+            ])
+    except IntegrityError:
+        raise ValidationError(
+            {"seats": "Some of the places are held by someone else."}
+        )
+    return {
+        "reference": reference,
+        "flight": flight,
+        "seats": [{"row": row, "seat": seat} for row, seat in seats],
+        "expires_at": expires_at,
+    }
+
+
+def confirm_hold(user, reference) -> Order:
+    """Turn the user's unexpired hold into an order.
+
+    The held seats were validated when they were held and nobody else can
+    book them, so the tickets are issued without validating them again.
+    """
+    try:
+        with transaction.atomic():
+            holds = list(
+                SeatHold.objects.select_for_update().filter(
+                    reference=reference,
+                    user=user,
+                    expires_at__gt=timezone.now(),
+                ).order_by("pk")
+            )
+            if not holds:
+                raise NotFound("The hold does not exist or has expired.")
+            order = Order.objects.create(user=user)
+            flights = lock_flights({hold.flight_id for hold in holds})
+            issue_tickets(
+                order,
+                [
+                    {
+                        "flight": flights[hold.flight_id],
+                        "row": hold.row,
+                        "seat": hold.seat,
+                    }
+                    for hold in holds
+                ],
+                flights,
+            )
+            SeatHold.objects.filter(
+                pk__in=[hold.pk for hold in holds]
+            ).delete()
+            return order
+    except IntegrityError:
+        raise ValidationError(
+            "The held places have been bought by someone else."
+        )
+
+
+def release_hold(user, reference) -> int:
+    """Delete the user's hold and return the number of released seats."""
+    deleted, _ = SeatHold.objects.filter(
+        reference=reference, user=user
+    ).delete()
+    return deleted
+
+
+def reap_seat_holds(batch_size=1000) -> int:
+    """Delete the expired holds in primary key batches.
+
+    Returns the number of deleted holds.
+    """
+    now = timezone.now()
+    reaped = 0
+    while True:
+        pks = list(
+            SeatHold.objects.filter(expires_at__lte=now).
+            order_by("pk").
+            values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            return reaped
+        reaped += SeatHold.objects.filter(pk__in=pks).delete()[0]
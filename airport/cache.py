@@ -0,0 +1,102 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import status
+from rest_framework.response import Response
+
+from airport_service.metrics import registry
+
+
+def get_cache():
+    return caches[getattr(settings, "AIRPORT_CACHE_ALIAS", "default")]
+
+
+def _version_key(model) -> str:
+    return f"airport:version:{model._meta.label_lower}"
+
+
+def get_version(model) -> int:
+    """Return the current cache generation of the model's list responses.
+
+    Generations start from the current time in milliseconds, so a version
+    evicted from the cache never comes back with an old, stale value.
+    """
+    cache = get_cache()
+    version = cache.get(_version_key(model))
+    if version is None:
+        cache.add(_version_key(model), int(time.time() * 1000), None)
+        version = cache.get(_version_key(model))
+    return version
+
+
+def invalidate(model) -> None:
+    """Drop every cached list response of the model."""
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(model))
+    except ValueError:
+        cache.set(_version_key(model), int(time.time() * 1000), None)
+
+
+def compute_etag(data) -> str:
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    return '"%s"' % hashlib.md5(body.encode()).hexdigest()
+
+
+def seat_map_etag(rows, seats_in_row, occupied_seats) -> str:
+    return '"%s"' % hashlib.md5(
+        b"%d:%d:%s" % (rows, seats_in_row, bytes(occupied_seats))
+    ).hexdigest()
+
+
+def list_cache_key(model, uri) -> str:
+    """Cache key of a list response, changes when the model is saved."""
+    return (
+        f"airport:list:{model._meta.label_lower}:"
+        f"{get_version(model)}:{hashlib.md5(uri.encode()).hexdigest()}"
+    )
+
+
+def not_modified(request, etag) -> bool:
+    """Tell whether the request's If-None-Match matches the ETag."""
+    if_none_match = request.headers.get("If-None-Match", "")
+    return if_none_match.strip() == "*" or etag in [
+        tag.strip() for tag in if_none_match.split(",")
+    ]
+
+
+class CachedListMixin:
+    """Serve list responses from the cache and answer conditional GETs.
+
+    Cached pages are invalidated by the post_save/post_delete handlers in
+    airport.signals, bulk queryset operations bypass them.
+    """
+
+    def list(self, request, *args, **kwargs):
+        model = self.queryset.model
+        cache = get_cache()
+        key = list_cache_key(model, request.build_absolute_uri())
+
+        cached = cache.get(key)
+        registry.record_cache(hit=cached is not None)
+        if cached is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cached = (response.data, compute_etag(response.data))
+            cache.set(
+                key,
+                cached,
+                getattr(settings, "AIRPORT_CACHE_TIMEOUT", 300),
+            )
+        data, etag = cached
+
+        if not_modified(request, etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        return Response(data, headers={"ETag": etag})
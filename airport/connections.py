@@ -0,0 +1,151 @@
+"""
+Search of connecting flights with layover windows.
+
+Every leg costs one query: the flights departing from the airports
+reached so far within the layover window after the earliest and latest
+arrivals. The flights are indexed per departure airport in departure
+time order, and the departures fitting a layover are cut from the index
+with bisect.
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import F
+
+from airport.models import Flight
+
+MAX_STOPS = 2
+FLIGHT_FIELDS = (
+    "id",
+    "route_id",
+    "airplane_id",
+    "departure_time",
+    "arrival_time",
+    "route__source_id",
+    "route__destination_id",
+    "tickets_available",
+)
+
+
+class DeparturesIndex:
+    """Flights per departure airport, sorted by departure time."""
+
+    def __init__(self, flights) -> None:
+        by_airport = defaultdict(list)
+        for flight in flights:
+            by_airport[flight["source"]].append(flight)
+        self.flights = {}
+        self.departures = {}
+        for airport, departing in by_airport.items():
+            departing.sort(key=lambda flight: flight["departure_time"])
+            self.flights[airport] = departing
+            self.departures[airport] = [
+                flight["departure_time"] for flight in departing
+            ]
+
+    def window(self, airport, start, end) -> list:
+        """Return the flights leaving ``airport`` from start to end."""
+        departures = self.departures.get(airport)
+        if not departures:
+            return []
+        return self.flights[airport][
+            bisect_left(departures, start):bisect_right(departures, end)
+        ]
+
+
+def _flights(queryset) -> list:
+    capacity = F("airplane__rows") * F("airplane__seats_in_row")
+    rows = queryset.annotate(
+        tickets_available=capacity - F("seats_sold")
+    ).values_list(*FLIGHT_FIELDS)
+    return [
+        {
+            "id": flight_id,
+            "route": route_id,
+            "airplane": airplane_id,
+            "departure_time": departure_time,
+            "arrival_time": arrival_time,
+            "source": source,
+            "destination": destination,
+            "tickets_available": tickets_available,
+        }
+        for (
+            flight_id,
+            route_id,
+            airplane_id,
+            departure_time,
+            arrival_time,
+            source,
+            destination,
+            tickets_available,
+        ) in rows
+    ]
+
+
+def find_connections(
+        source,
+        destination,
+        departure_from,
+        departure_to,
+        min_layover=timedelta(minutes=45),
+        max_layover=timedelta(hours=6),
+        max_stops=1,
+        limit=20,
+) -> list:
+    """Return up to ``limit`` itineraries from source to destination.
+
+    The first leg departs from ``departure_from`` to ``departure_to``,
+    every next leg departs from the previous leg's destination between
+    ``min_layover`` and ``max_layover`` after its arrival. Itineraries
+    never visit an airport twice and are sorted by arrival time, then by
+    the number of stops and the departure time. Legs with no tickets
+    left are skipped.
+    """
+    legs = _flights(Flight.objects.filter(
+        route__source_id=source,
+        departure_time__gte=departure_from,
+        departure_time__lt=departure_to,
+        seats_sold__lt=F("airplane__rows") * F("airplane__seats_in_row"),
+    ))
+    paths = [[leg] for leg in legs]
+    itineraries = [
+        path for path in paths if path[-1]["destination"] == destination
+    ]
+    paths = [path for path in paths if path[-1]["destination"] != destination]
+
+    for stop in range(1, max_stops + 1):
+        if not paths:
+            break
+        arrivals = [path[-1]["arrival_time"] for path in paths]
+        queryset = Flight.objects.filter(
+            route__source_id__in={path[-1]["destination"] for path in paths},
+            departure_time__gte=min(arrivals) + min_layover,
+            departure_time__lte=max(arrivals) + max_layover,
+            seats_sold__lt=F("airplane__rows") * F("airplane__seats_in_row"),
+        )
+        if stop == max_stops:
+            queryset = queryset.filter(route__destination_id=destination)
+        index = DeparturesIndex(_flights(queryset))
+
+        next_paths = []
+        for path in paths:
+            visited = {leg["source"] for leg in path}
+            arrival = path[-1]["arrival_time"]
+            for leg in index.window(
+                    path[-1]["destination"],
+                    arrival + min_layover,
+                    arrival + max_layover,
+            ):
+                if leg["destination"] in visited:
+                    continue
+                if leg["destination"] == destination:
+                    itineraries.append(path + [leg])
+                else:
+                    next_paths.append(path + [leg])
+        paths = next_paths
+
+    itineraries.sort(key=lambda path: (
+        path[-1]["arrival_time"], len(path), path[0]["departure_time"]
+    ))
+    return itineraries[:limit]
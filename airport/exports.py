@@ -0,0 +1,98 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+from django.utils import timezone
+
+from airport.models import Order, Ticket
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Exported columns and the lookups they are read from, per dataset.
+EXPORT_COLUMNS = {
+    "orders": (
+        ("order_id", "id"),
+        ("created_at", "created_at"),
+        ("user_id", "user_id"),
+        ("user_email", "user__email"),
+        ("tickets", "tickets_count"),
+    ),
+    "tickets": (
+        ("ticket_id", "id"),
+        ("order_id", "order_id"),
+        ("order_created_at", "order__created_at"),
+        ("user_email", "order__user__email"),
+        ("flight_id", "flight_id"),
+        ("source", "flight__route__source__name"),
+        ("destination", "flight__route__destination__name"),
+        ("departure_time", "flight__departure_time"),
+        ("arrival_time", "flight__arrival_time"),
+        ("row", "row"),
+        ("seat", "seat"),
+    ),
+}
+EXPORT_FORMATS = ("csv", "ndjson")
+
+
+def day_start(date):
+    return timezone.make_aware(datetime.combine(date, time.min))
+
+
+def export_rows(dataset, created_from=None, created_to=None,
+                chunk_size=EXPORT_CHUNK_SIZE):
+    """Iterate over the value tuples of a dataset.
+
+    ``created_from`` and ``created_to`` are inclusive dates matched against
+    the order creation time. Rows are fetched ``chunk_size`` at a time
+    in primary key order, so memory use does not grow with the export.
+    """
+    if dataset == "orders":
+        queryset = Order.objects.annotate(tickets_count=Count("tickets"))
+        created_at = "created_at"
+    else:
+        queryset = Ticket.objects.all()
+        created_at = "order__created_at"
+
+    if created_from:
+        queryset = queryset.filter(
+            **{f"{created_at}__gte": day_start(created_from)}
+        )
+    if created_to:
+        queryset = queryset.filter(
+            **{f"{created_at}__lt": day_start(created_to) + timedelta(days=1)}
+        )
+
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS[dataset]]
+    return queryset.order_by("id").values_list(*lookups).iterator(
+        chunk_size=chunk_size
+    )
+
+
+class _Echo:
+    """File-like object that returns what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(dataset, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in EXPORT_COLUMNS[dataset]])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(dataset, rows):
+    names = [name for name, _ in EXPORT_COLUMNS[dataset]]
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def export_lines(dataset, export_format, **filters):
+    """Iterate over the lines of a dataset rendered as csv or ndjson."""
+    rows = export_rows(dataset, **filters)
+    if export_format == "csv":
+        return csv_lines(dataset, rows)
+    return ndjson_lines(dataset, rows)
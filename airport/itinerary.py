@@ -0,0 +1,162 @@
+"""
+Multi-leg itinerary search over an in-memory index of the routes.
+
+The index is loaded with one query and kept current by the Route signal
+handlers in airport.signals. It also follows the list cache version of
+Route: with a cache shared by all workers (Redis in production) a process
+whose index missed a change (another worker saved a route, or rows were
+bulk loaded) rebuilds it on its next search. The version can only be
+trusted that far, so the index is rebuilt at least every
+ITINERARY_RELOAD_SECONDS as well.
+"""
+import heapq
+import threading
+import time
+
+from django.conf import settings
+
+from airport import cache
+from airport.models import Route
+
+MAX_HOPS = 6
+
+
+class RouteGraph:
+    """Adjacency index of the routes, source -> {destination: route}.
+
+    Writers replace a source's whole adjacency dict, so searches can read
+    it without a lock.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.adjacency = {}
+        self.routes = {}
+        self.version = None
+        self.loaded_at = None
+
+    def load(self, routes, version=None) -> None:
+        adjacency = {}
+        by_id = {}
+        for route_id, source, destination, distance in routes:
+            adjacency.setdefault(source, {})[destination] = (
+                route_id, distance
+            )
+            by_id[route_id] = (source, destination, distance)
+        with self.lock:
+            self.adjacency = adjacency
+            self.routes = by_id
+            self.version = version
+            self.loaded_at = time.monotonic()
+
+    def add(self, route_id, source, destination, distance) -> None:
+        with self.lock:
+            self._remove(route_id)
+            edges = dict(self.adjacency.get(source, {}))
+            edges[destination] = (route_id, distance)
+            self.adjacency[source] = edges
+            self.routes[route_id] = (source, destination, distance)
+
+    def remove(self, route_id) -> None:
+        with self.lock:
+            self._remove(route_id)
+
+    def _remove(self, route_id) -> None:
+        route = self.routes.pop(route_id, None)
+        if route is None:
+            return
+        source, destination = route[:2]
+        edges = dict(self.adjacency.get(source, {}))
+        edges.pop(destination, None)
+        self.adjacency[source] = edges
+
+    def search(self, source, destination, max_hops=3, max_distance=None,
+               optimize="distance"):
+        """Return the best path as (route id, source, destination,
+        distance) tuples, or None.
+
+        ``optimize`` is "distance" for the shortest path or "hops" for the
+        fewest legs, ties are broken by the other measure. Paths longer
+        than ``max_hops`` legs or ``max_distance`` km are not considered.
+        """
+        if source == destination:
+            return None
+        by_hops = optimize == "hops"
+        # Labels are (parent label, route) pairs, so paths are only built
+        # for the answer. An airport is expanded again only when reached
+        # with fewer hops, which may still fit into max_hops.
+        labels = [(None, None)]
+        queue = [(0, 0, 0, source, 0)]
+        expanded_hops = {}
+        while queue:
+            first, second, hops, airport, label = heapq.heappop(queue)
+            if airport == destination:
+                path = []
+                while labels[label][1] is not None:
+                    label, route = labels[label]
+                    path.append(route)
+                return path[::-1]
+            if expanded_hops.get(airport, max_hops + 1) <= hops:
+                continue
+            expanded_hops[airport] = hops
+            if hops == max_hops:
+                continue
+            distance = second if by_hops else first
+            for next_airport, (route_id, leg) in self.adjacency.get(
+                airport, {}
+            ).items():
+                total = distance + leg
+                if max_distance is not None and total > max_distance:
+                    continue
+                if expanded_hops.get(next_airport, max_hops + 1) <= hops + 1:
+                    continue
+                labels.append(
+                    (label, (route_id, airport, next_airport, leg))
+                )
+                heapq.heappush(queue, (
+                    hops + 1 if by_hops else total,
+                    total if by_hops else hops + 1,
+                    hops + 1,
+                    next_airport,
+                    len(labels) - 1,
+                ))
+        return None
+
+
+graph = RouteGraph()
+
+
+def current_graph() -> RouteGraph:
+    """Return the index, rebuilt if it missed a change of the routes or
+    is older than ITINERARY_RELOAD_SECONDS."""
+    version = cache.get_version(Route)
+    reload_after = getattr(settings, "ITINERARY_RELOAD_SECONDS", 60)
+    if graph.version != version or (
+        time.monotonic() - graph.loaded_at >= reload_after
+    ):
+        graph.load(
+            Route.objects.values_list(
+                "id", "source_id", "destination_id", "distance"
+            ),
+            version,
+        )
+    return graph
+
+
+def route_changed(route=None, deleted_id=None) -> None:
+    """Apply a saved or deleted route to the index.
+
+    Called after the list cache version was bumped for the change. If the
+    index was current before it, the change is applied in place,
+    otherwise the index is left to be rebuilt on the next search.
+    """
+    version = cache.get_version(Route)
+    if graph.version is None or graph.version != version - 1:
+        return
+    if route is not None:
+        graph.add(
+            route.pk, route.source_id, route.destination_id, route.distance
+        )
+    else:
+        graph.remove(deleted_id)
+    graph.version = version
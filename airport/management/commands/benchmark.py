@@ -0,0 +1,272 @@
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.models import Flight
+from airport.seed import CITIES, SEED_PASSWORD, seed_database
+from airport_service.metrics import QueryCounter
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and load-test the API endpoints "
+        "with concurrent in-process clients"
+    )
+
+    endpoints = ("flights", "flights_search", "airports", "orders", "token")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=1000,
+            help="Number of seeded flights and orders",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Requests sent to every endpoint",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Number of concurrent clients",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            dest="selected",
+            choices=self.endpoints,
+            help="Only benchmark the given endpoint, can be repeated",
+        )
+        parser.add_argument(
+            "--hashing-workers",
+            type=int,
+            help=(
+                "Password hashing processes, PASSWORD_HASHING_WORKERS by "
+                "default, 0 hashes on the request threads"
+            ),
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the results as JSON to this file",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the benchmark database between runs",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        database_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"]
+        )
+        # Throttling would turn the load into 429 responses and the
+        # expected 400s of taken seats would flood the output.
+        get_throttles = APIView.get_throttles
+        APIView.get_throttles = lambda view: []
+        request_logger = logging.getLogger("django.request")
+        log_level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            # Replicas are not part of the throwaway database.
+            hashing_workers = options["hashing_workers"]
+            if hashing_workers is None:
+                hashing_workers = settings.PASSWORD_HASHING_WORKERS
+            with override_settings(
+                DATABASE_REPLICAS=[],
+                PASSWORD_HASHING_WORKERS=hashing_workers,
+            ):
+                report = self.run(options)
+        finally:
+            APIView.get_throttles = get_throttles
+            request_logger.setLevel(log_level)
+            connection.creation.destroy_test_db(
+                database_name, verbosity=0, keepdb=options["keepdb"]
+            )
+            teardown_test_environment()
+
+        for name, result in report["endpoints"].items():
+            self.stdout.write(
+                f"{name:>15}: "
+                f"p50 {result['p50_ms']:8.2f} ms  "
+                f"p95 {result['p95_ms']:8.2f} ms  "
+                f"p99 {result['p99_ms']:8.2f} ms  "
+                f"{result['throughput_rps']:8.1f} req/s  "
+                f"{result['queries_mean']:5.1f} queries"
+            )
+        if "token" in report["endpoints"]:
+            self.stdout.write(
+                f"{'logins':>15}: "
+                f"{report['endpoints']['token']['logins_per_core']:8.1f} "
+                f"logins/s per core "
+                f"({report['hashing_workers'] or 'inline'} hashing)"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f"Results saved to {options['output']}")
+            )
+
+    def run(self, options):
+        seed = random.randrange(1 << 30)
+        seeded = seed_database(options["size"], seed=seed)
+        users = list(
+            get_user_model().objects.filter(
+                email__startswith=f"seed-user-{seed}-"
+            )
+        )
+        get_user_model().objects.filter(
+            pk__in=[user.pk for user in users]
+        ).update(is_staff=True)
+        self.flight_ids = list(Flight.objects.values_list("id", flat=True))
+
+        endpoints = {}
+        for name in options["selected"] or self.endpoints:
+            endpoints[name] = self.measure(
+                getattr(self, f"request_{name}"),
+                users,
+                options["requests"],
+                options["concurrency"],
+            )
+        # Hashing runs on the request threads or in the worker processes,
+        # so the cores busy hashing are the one or the other.
+        hashing_workers = settings.PASSWORD_HASHING_WORKERS
+        if "token" in endpoints:
+            cores = min(
+                hashing_workers or options["concurrency"],
+                os.cpu_count() or 1,
+            )
+            endpoints["token"]["logins_per_core"] = (
+                endpoints["token"]["throughput_rps"] / cores
+            )
+        return {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "settings": os.environ.get("DJANGO_SETTINGS_MODULE"),
+            "database": connection.vendor,
+            "size": options["size"],
+            "seeded": seeded,
+            "concurrency": options["concurrency"],
+            "hashing_workers": hashing_workers,
+            "requests": options["requests"],
+            "endpoints": endpoints,
+        }
+
+    def measure(self, make_request, users, requests, concurrency):
+        latencies = []
+        queries = []
+        query_time = []
+        statuses = Counter()
+        lock = threading.Lock()
+
+        def worker(number):
+            client = Client()
+            rand = random.Random(number)
+            user = users[number % len(users)]
+            client.defaults["HTTP_AUTHORIZATION"] = (
+                f"Bearer {AccessToken.for_user(user)}"
+            )
+            try:
+                for _ in range(number, requests, concurrency):
+                    counter = QueryCounter()
+                    with connection.execute_wrapper(counter):
+                        start = time.perf_counter()
+                        response = make_request(client, rand, user)
+                        elapsed = time.perf_counter() - start
+                    with lock:
+                        latencies.append(elapsed * 1000)
+                        queries.append(counter.count)
+                        query_time.append(counter.duration * 1000)
+                        statuses[response.status_code] += 1
+            finally:
+                connection.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(worker, range(concurrency)))
+        wall_time = time.perf_counter() - start
+
+        return {
+            "requests": len(latencies),
+            "statuses": dict(statuses),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": sum(latencies) / len(latencies),
+            "throughput_rps": len(latencies) / wall_time,
+            "queries_mean": sum(queries) / len(queries),
+            "queries_max": max(queries),
+            "db_time_mean_ms": sum(query_time) / len(query_time),
+        }
+
+    def request_flights(self, client, rand, user):
+        return client.get(reverse("airport:flight-list"))
+
+    def request_flights_search(self, client, rand, user):
+        return client.get(
+            reverse("airport:flight-list"),
+            {
+                "from_city": rand.choice(CITIES),
+                "departure_from": "2025-01-01",
+                "departure_to": "2025-01-31",
+            },
+        )
+
+    def request_airports(self, client, rand, user):
+        return client.get(reverse("airport:airport-list"))
+
+    def request_orders(self, client, rand, user):
+        payload = {
+            "tickets": [
+                {
+                    "flight": rand.choice(self.flight_ids),
+                    "row": rand.randint(1, 20),
+                    "seat": rand.randint(1, 6),
+                }
+            ]
+        }
+        return client.post(
+            reverse("airport:order-list"),
+            payload,
+            content_type="application/json",
+        )
+
+    def request_token(self, client, rand, user):
+        return client.post(
+            reverse("user:token_obtain_pair"),
+            {"email": user.email, "password": SEED_PASSWORD},
+            content_type="application/json",
+        )
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from airport.exports import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_COLUMNS,
+    EXPORT_FORMATS,
+    export_lines,
+)
+
+
+def date_argument(value):
+    date = parse_date(value)
+    if date is None:
+        raise CommandError(f"Expected a date in YYYY-MM-DD, got {value!r}.")
+    return date
+
+
+class Command(BaseCommand):
+    help = "Stream every order or ticket as csv or ndjson"
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=list(EXPORT_COLUMNS))
+        parser.add_argument(
+            "--format",
+            dest="export_format",
+            choices=EXPORT_FORMATS,
+            default="csv",
+        )
+        parser.add_argument(
+            "--from",
+            dest="created_from",
+            type=date_argument,
+            help="Orders created on or after the date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--to",
+            dest="created_to",
+            type=date_argument,
+            help="Orders created on or before the date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help="Number of rows fetched from the database at a time",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write to this file instead of stdout",
+        )
+
+    def handle(self, *args, **options):
+        lines = export_lines(
+            options["dataset"],
+            options["export_format"],
+            created_from=options["created_from"],
+            created_to=options["created_to"],
+            chunk_size=options["chunk_size"],
+        )
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
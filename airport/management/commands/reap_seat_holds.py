@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from airport.booking import reap_seat_holds
+
+
+class Command(BaseCommand):
+    help = "Delete the expired seat holds"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of holds deleted per batch",
+        )
+
+    def handle(self, *args, **options):
+        reaped = reap_seat_holds(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {reaped} expired hold(s).")
+        )
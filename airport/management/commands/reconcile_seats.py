@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from airport.booking import reconcile_flights
+from airport.models import Flight
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount Flight.seats_sold and rebuild the seat bitmaps "
+        "from the tickets table"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of flights reconciled per batch",
+        )
+        parser.add_argument(
+            "--flight",
+            type=int,
+            action="append",
+            dest="flights",
+            help="Only reconcile the given flight id, can be repeated",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Flight.objects.all()
+        if options["flights"]:
+            queryset = queryset.filter(pk__in=options["flights"])
+        corrected = reconcile_flights(queryset, options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Corrected {corrected} flight(s).")
+        )
@@ -0,0 +1,96 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.snapshot import (
+    SNAPSHOT_BATCH_SIZE,
+    dump_snapshot,
+    load_snapshot,
+    snapshot_models,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a JSON fixture such as db.json in bulk batches, or dump the "
+        "database to one, streaming the rows in chunks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("mode", choices=("load", "dump"))
+        parser.add_argument(
+            "path",
+            help="Fixture file, - reads from stdin or writes to stdout",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SNAPSHOT_BATCH_SIZE,
+            help="Number of rows inserted or read at a time",
+        )
+        parser.add_argument(
+            "--validate",
+            action="store_true",
+            help="Run model validation on every loaded row",
+        )
+        parser.add_argument(
+            "--model",
+            action="append",
+            dest="labels",
+            help=(
+                "Only dump the given app label or app_label.Model, "
+                "can be repeated"
+            ),
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database to load into or dump from",
+        )
+
+    def handle(self, *args, **options):
+        if options["mode"] == "load":
+            counts = self.load(options)
+            verb = "Loaded"
+        else:
+            counts = self.dump(options)
+            verb = "Dumped"
+        if options["path"] != "-" or options["mode"] == "load":
+            self.stdout.write(self.style.SUCCESS(
+                f"{verb} {sum(counts.values())} object(s): " + ", ".join(
+                    f"{model._meta.label} {count}"
+                    for model, count in counts.items()
+                )
+            ))
+
+    def load(self, options):
+        try:
+            if options["path"] == "-":
+                return self.load_stream(sys.stdin, options)
+            with open(options["path"], encoding="utf-8") as stream:
+                return self.load_stream(stream, options)
+        except ValueError as error:
+            raise CommandError(f"Could not load the snapshot: {error}")
+
+    def load_stream(self, stream, options):
+        return load_snapshot(
+            stream,
+            batch_size=options["batch_size"],
+            validate=options["validate"],
+            using=options["database"],
+        )
+
+    def dump(self, options):
+        try:
+            models = snapshot_models(options["labels"] or ("user", "airport"))
+        except LookupError as error:
+            raise CommandError(error)
+        if options["path"] == "-":
+            self.stdout.ending = ""
+            return dump_snapshot(
+                self.stdout, models, options["batch_size"], options["database"]
+            )
+        with open(options["path"], "w", encoding="utf-8") as stream:
+            return dump_snapshot(
+                stream, models, options["batch_size"], options["database"]
+            )
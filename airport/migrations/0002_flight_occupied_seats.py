@@ -0,0 +1,39 @@
+# Generated by Django 4.1 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+
+def fill_occupied_seats(apps, schema_editor):
+    # One bit per seat, row by row, as airport.seats.SeatMap stored them
+    # when this migration was written.
+    Flight = apps.get_model("airport", "Flight")
+    Ticket = apps.get_model("airport", "Ticket")
+    for flight in Flight.objects.select_related("airplane").iterator():
+        rows = flight.airplane.rows
+        seats_in_row = flight.airplane.seats_in_row
+        bits = bytearray((rows * seats_in_row + 7) // 8)
+        tickets = Ticket.objects.filter(flight=flight).values_list(
+            "row", "seat"
+        )
+        for row, seat in tickets:
+            if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+                index = (row - 1) * seats_in_row + (seat - 1)
+                bits[index >> 3] |= 1 << (index & 7)
+        flight.occupied_seats = bytes(bits)
+        flight.save(update_fields=["occupied_seats"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flight',
+            name='occupied_seats',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.RunPython(fill_occupied_seats, migrations.RunPython.noop),
+    ]
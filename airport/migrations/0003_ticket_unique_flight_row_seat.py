@@ -0,0 +1,44 @@
+# Generated by Django 4.1 on 2026-10-18 17:11
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_tickets(apps, schema_editor):
+    # Seats sold twice before the constraint existed cannot be resolved
+    # here, one of the buyers has to be refunded first.
+    Ticket = apps.get_model("airport", "Ticket")
+    duplicates = Ticket.objects.values("flight", "row", "seat").annotate(
+        count=Count("id")
+    ).filter(count__gt=1)
+    ticket_ids = []
+    for place in duplicates:
+        ticket_ids.append(sorted(Ticket.objects.filter(
+            flight=place["flight"], row=place["row"], seat=place["seat"]
+        ).values_list("id", flat=True)))
+    if ticket_ids:
+        raise RuntimeError(
+            "Seats were sold more than once, delete or move all but one "
+            "ticket of each group before migrating: "
+            + "; ".join(
+                ", ".join(str(ticket_id) for ticket_id in group)
+                for group in ticket_ids
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0002_flight_occupied_seats'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            check_duplicate_tickets, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ticket',
+            constraint=models.UniqueConstraint(fields=('flight', 'row', 'seat'), name='unique_ticket_flight_row_seat'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.1 on 2026-10-18 17:17
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_seats_sold(apps, schema_editor):
+    Flight = apps.get_model("airport", "Flight")
+    Ticket = apps.get_model("airport", "Ticket")
+    sold = (
+        Ticket.objects.filter(flight=OuterRef("pk")).
+        values("flight").
+        annotate(count=Count("id")).
+        values("count")
+    )
+    Flight.objects.update(seats_sold=Coalesce(Subquery(sold), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0005_flight_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flight',
+            name='seats_sold',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_seats_sold, migrations.RunPython.noop),
+    ]
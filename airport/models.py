@@ -1,6 +1,13 @@
-from django.db import models
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F
 from django.conf import settings
 
+from airport import validation
+from airport.seats import SeatMap
+
 
 class Crew(models.Model):
     first_name = models.CharField(max_length=100)
@@ -32,6 +39,16 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="order_created_at_id_idx",
+            ),
+            models.Index(
+                fields=["user", "-created_at"],
+                name="order_user_created_at_idx",
+            ),
+        ]
 
 
 class Airplane(models.Model):
@@ -69,12 +86,19 @@ class Route(models.Model):
         return f"{self.source} → {self.destination} ({self.distance} km)"
 
     @staticmethod
-    def validate_route(destination, distance, source):
-        errors = {}
-        if Route.objects.filter(
+    def route_exists(destination, distance, pk=None):
+        return validation.lookup(
+            ("route_exists", getattr(destination, "pk", None), distance, pk),
+            lambda: Route.objects.filter(
                 destination=destination,
                 distance=distance
-        ).exists():
+            ).exclude(pk=pk).exists()
+        )
+
+    @staticmethod
+    def validate_route(destination, distance, source, pk=None):
+        errors = {}
+        if Route.route_exists(destination, distance, pk):
             errors["route_exist"] = "The route already exist."
             return errors["route_exist"]
         elif destination == source:
@@ -83,15 +107,22 @@ class Route(models.Model):
         return errors
 
     def clean(self):
-        Route.validate_route(
+        error = Route.validate_route(
             self.destination,
             self.distance,
             self.source,
+            self.pk,
         )
+        if error:
+            raise ValidationError(error)
 
     def save(self, *args, **kwargs):
-        self.clean()
+        if validation.should_clean():
+            self.clean()
         super().save(*args, **kwargs)
+        validation.remember(
+            ("route_exists", self.destination_id, self.distance, None), True
+        )
 
     class Meta:
         unique_together = ('source', 'destination')
@@ -102,13 +133,53 @@ class Flight(models.Model):
     airplane = models.ForeignKey(Airplane, on_delete=models.CASCADE)
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
+    occupied_seats = models.BinaryField(default=bytes)
+    seats_sold = models.IntegerField(default=0)
+
+    def airplane_dimensions(self) -> tuple:
+        """Return (rows, seats_in_row), read once per validation scope."""
+        return validation.lookup(
+            ("airplane_dimensions", self.airplane_id),
+            lambda: (self.airplane.rows, self.airplane.seats_in_row),
+        )
+
+    @property
+    def seat_map(self) -> SeatMap:
+        return SeatMap(*self.airplane_dimensions(), self.occupied_seats)
+
+    @staticmethod
+    def update_seat_map(flight_id, occupy=(), release=()):
+        with transaction.atomic():
+            flight = (
+                Flight.objects.select_for_update(of=("self",)).
+                select_related("airplane").
+                filter(pk=flight_id).
+                first()
+            )
+            if flight is None:
+                return
+            seat_map = flight.seat_map
+            sold = seat_map.occupied_count()
+            for row, seat in release:
+                if seat_map.contains(row, seat):
+                    seat_map.release(row, seat)
+            for row, seat in occupy:
+                if seat_map.contains(row, seat):
+                    seat_map.occupy(row, seat)
+            Flight.objects.filter(pk=flight_id).update(
+                occupied_seats=bytes(seat_map),
+                seats_sold=(
+                    F("seats_sold") + seat_map.occupied_count() - sold
+                ),
+            )
 
     @staticmethod
     def validate_route(
             route,
             airplane,
             departure_time,
-            arrival_time
+            arrival_time,
+            pk=None,
     ):
         errors = {}
         if Flight.objects.filter(
@@ -116,7 +187,7 @@ class Flight(models.Model):
                 airplane=airplane,
                 departure_time=departure_time,
                 arrival_time=arrival_time,
-        ):
+        ).exclude(pk=pk).exists():
             errors["flight_exist"] = (
                 f"Flight with route '{route}'already exist."
             )
@@ -135,17 +206,33 @@ class Flight(models.Model):
         )
 
     def clean(self):
-        Flight.validate_route(
+        errors = Flight.validate_route(
             self.route,
             self.airplane,
             self.departure_time,
             self.arrival_time,
+            self.pk,
         )
+        if errors:
+            raise ValidationError(errors)
 
     def save(self, *args, **kwargs):
-        self.clean()
+        if validation.should_clean():
+            self.clean()
         super().save(*args, **kwargs)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["departure_time", "id"],
+                name="flight_departure_id_idx",
+            ),
+            models.Index(
+                fields=["route", "departure_time"],
+                name="flight_route_departure_idx",
+            ),
+        ]
+
 
 class Ticket(models.Model):
     row = models.IntegerField()
@@ -164,37 +251,101 @@ class Ticket(models.Model):
     @staticmethod
     def validate_ticket(row, seat, flight):
         errors = {}
-        if Ticket.objects.filter(
-                row=row,
-                seat=seat,
-                flight=flight,
-        ):
-            errors["route_exist"] = (
-                f"The place 'seat: {seat}, row: {row}' "
-                f"with flight '{flight}' already bought."
-            )
-        elif row < 1 or row > flight.airplane.rows:
+        rows, seats_in_row = flight.airplane_dimensions()
+        if row < 1 or row > rows:
             errors["row_not_exist"] = (
                 f"The row can be in range "
-                f"from 1 to {flight.airplane.rows} not {row}."
+                f"from 1 to {rows} not {row}."
             )
-        elif seat < 1 or seat > flight.airplane.seats_in_row:
+        elif seat < 1 or seat > seats_in_row:
             errors["row_not_exist"] = (
                 f"The seat can be in range "
-                f"from 1 to {flight.airplane.seats_in_row} not {seat}."
+                f"from 1 to {seats_in_row} not {seat}."
+            )
+        elif flight.seat_map.is_occupied(row, seat):
+            errors["route_exist"] = (
+                f"The place 'seat: {seat}, row: {row}' "
+                f"with flight '{flight}' already bought."
             )
         return errors
 
     def clean(self):
-        Ticket.validate_ticket(
+        errors = Ticket.validate_ticket(
             self.row,
             self.seat,
             self.flight,
         )
+        if "route_exist" in errors and not self._state.adding:
+            if Ticket.objects.filter(
+                    pk=self.pk,
+                    flight_id=self.flight_id,
+                    row=self.row,
+                    seat=self.seat,
+            ).exists():
+                errors = {}
+        if errors:
+            raise ValidationError(errors)
 
     def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
+        if validation.should_clean():
+            self.clean()
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = Ticket.objects.filter(pk=self.pk).values(
+                    "flight_id", "row", "seat"
+                ).first()
+            super().save(*args, **kwargs)
+            if previous and previous["flight_id"] != self.flight_id:
+                Flight.update_seat_map(
+                    previous["flight_id"],
+                    release=[(previous["row"], previous["seat"])],
+                )
+                previous = None
+            Flight.update_seat_map(
+                self.flight_id,
+                occupy=[(self.row, self.seat)],
+                release=(
+                    [(previous["row"], previous["seat"])] if previous else []
+                ),
+            )
 
     def __str__(self):
         return f"{self.flight}, row: {self.row}, seat: {self.seat}."
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["flight", "row", "seat"],
+                name="unique_ticket_flight_row_seat",
+            ),
+        ]
+
+
+class SeatHold(models.Model):
+    flight = models.ForeignKey(
+        Flight,
+        on_delete=models.CASCADE,
+        related_name="holds"
+    )
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE
+    )
+    reference = models.UUIDField(default=uuid.uuid4, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return (
+            f"{self.flight}, row: {self.row}, seat: {self.seat}, "
+            f"until {self.expires_at}."
+        )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["flight", "row", "seat"],
+                name="unique_seat_hold_flight_row_seat",
+            ),
+        ]
@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class DefaultCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("id",)
+
+
+class FlightCursorPagination(DefaultCursorPagination):
+    ordering = ("departure_time", "id")
+
+
+class OrderCursorPagination(DefaultCursorPagination):
+    ordering = ("-created_at", "-id")
@@ -0,0 +1,41 @@
+class SeatMap:
+    """Bitset of occupied seats of a flight, one bit per seat."""
+
+    def __init__(self, rows: int, seats_in_row: int, data=b"") -> None:
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        self.bits = bytearray(data or b"")
+        size = (self.capacity + 7) // 8
+        if len(self.bits) < size:
+            self.bits.extend(bytes(size - len(self.bits)))
+
+    @property
+    def capacity(self) -> int:
+        return self.rows * self.seats_in_row
+
+    def contains(self, row: int, seat: int) -> bool:
+        return 1 <= row <= self.rows and 1 <= seat <= self.seats_in_row
+
+    def index(self, row: int, seat: int) -> int:
+        return (row - 1) * self.seats_in_row + (seat - 1)
+
+    def is_occupied(self, row: int, seat: int) -> bool:
+        index = self.index(row, seat)
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def occupy(self, row: int, seat: int) -> None:
+        index = self.index(row, seat)
+        self.bits[index >> 3] |= 1 << (index & 7)
+
+    def release(self, row: int, seat: int) -> None:
+        index = self.index(row, seat)
+        self.bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def occupied_count(self) -> int:
+        return int.from_bytes(self.bits, "little").bit_count()
+
+    def available_count(self) -> int:
+        return self.capacity - self.occupied_count()
+
+    def __bytes__(self) -> bytes:
+        return bytes(self.bits)
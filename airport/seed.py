@@ -0,0 +1,135 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from airport.booking import reconcile_flights
+from airport.models import (
+    Crew,
+    AirplaneType,
+    Order,
+    Airplane,
+    Airport,
+    Route,
+    Flight,
+    Ticket,
+)
+
+SEED_PASSWORD = "seed-password"
+
+CITIES = (
+    "Kyiv", "Lviv", "Odesa", "Kharkiv", "Dnipro", "Warsaw", "Krakow",
+    "Berlin", "Munich", "Vienna", "Prague", "Budapest", "Paris", "Lyon",
+    "Madrid", "Barcelona", "Rome", "Milan", "London", "Dublin",
+)
+
+
+def seed_database(size: int = 100, seed: int = 0) -> dict:
+    """Fill the database with ``size`` flights, orders and related rows.
+
+    Rows are inserted with bulk_create, so model validation is skipped and
+    the flights' seat counters are reconciled at the end. All users share
+    the SEED_PASSWORD. Returns the number of created rows per model.
+    """
+    rand = random.Random(seed)
+    users_count = max(size // 10, 2)
+    airports_count = min(max(size // 5, 4), 200)
+    base_time = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    password = make_password(SEED_PASSWORD)
+    users = get_user_model().objects.bulk_create([
+        get_user_model()(
+            email=f"seed-user-{seed}-{number}@example.com",
+            password=password,
+        )
+        for number in range(users_count)
+    ])
+
+    Crew.objects.bulk_create([
+        Crew(first_name=f"Pilot {number}", last_name=rand.choice(CITIES))
+        for number in range(max(size // 10, 1))
+    ])
+    airplane_types = AirplaneType.objects.bulk_create([
+        AirplaneType(name=name)
+        for name in ("Passenger", "Cargo", "Private", "Rescue")
+    ])
+    airplanes = Airplane.objects.bulk_create([
+        Airplane(
+            name=f"Airplane {number}",
+            rows=rand.randint(20, 40),
+            seats_in_row=6,
+            airplane_type=rand.choice(airplane_types),
+        )
+        for number in range(max(size // 10, 2))
+    ])
+    airports = Airport.objects.bulk_create([
+        Airport(
+            name=f"AP{number:03}",
+            closest_big_city=CITIES[number % len(CITIES)],
+        )
+        for number in range(airports_count)
+    ])
+
+    pairs = set()
+    while len(pairs) < min(size, airports_count * (airports_count - 1)):
+        source, destination = rand.sample(airports, 2)
+        pairs.add((source, destination))
+    routes = Route.objects.bulk_create([
+        Route(
+            source=source,
+            destination=destination,
+            distance=rand.randint(200, 3000),
+        )
+        for source, destination in pairs
+    ])
+
+    flights = []
+    for _ in range(size):
+        route = rand.choice(routes)
+        departure_time = base_time + timedelta(
+            minutes=rand.randrange(0, 60 * 24 * 60, 5)
+        )
+        flights.append(Flight(
+            route=route,
+            airplane=rand.choice(airplanes),
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(
+                minutes=route.distance // 12 + 30
+            ),
+        ))
+    flights = Flight.objects.bulk_create(flights)
+
+    orders = Order.objects.bulk_create([
+        Order(user=rand.choice(users)) for _ in range(size)
+    ])
+    next_seat = dict.fromkeys(range(len(flights)), 0)
+    tickets = []
+    for order in orders:
+        position = rand.randrange(len(flights))
+        flight = flights[position]
+        for _ in range(rand.randint(1, 3)):
+            index = next_seat[position]
+            if index >= flight.airplane.rows * flight.airplane.seats_in_row:
+                break
+            next_seat[position] += 1
+            tickets.append(Ticket(
+                order=order,
+                flight=flight,
+                row=index // flight.airplane.seats_in_row + 1,
+                seat=index % flight.airplane.seats_in_row + 1,
+            ))
+    Ticket.objects.bulk_create(tickets)
+    reconcile_flights(Flight.objects.filter(
+        pk__in=[flight.pk for flight in flights]
+    ))
+
+    return {
+        "users": len(users),
+        "airports": len(airports),
+        "routes": len(routes),
+        "airplanes": len(airplanes),
+        "flights": len(flights),
+        "orders": len(orders),
+        "tickets": len(tickets),
+    }
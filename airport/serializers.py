@@ -1,8 +1,11 @@
-from django.db import transaction
+import base64
 
+from django.conf import settings
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from airport.booking import create_order, hold_seats
+from airport.validation import skip_model_clean
 from airport.models import (
     Crew,
     AirplaneType,
@@ -15,6 +18,21 @@ from airport.models import (
 )
 
 
+class ValidatedModelSerializer(serializers.ModelSerializer):
+    """Model serializer whose validate() already covers Model.clean().
+
+    Saving skips the model level clean() so every write is validated once.
+    """
+
+    def save(self, **kwargs):
+        with skip_model_clean():
+            return super().save(**kwargs)
+
+    @property
+    def instance_pk(self):
+        return self.instance.pk if self.instance is not None else None
+
+
 class CrewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Crew
@@ -39,13 +57,14 @@ class AirportSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "closest_big_city")
 
 
-class RouteSerializer(serializers.ModelSerializer):
+class RouteSerializer(ValidatedModelSerializer):
     def validate(self, attrs):
         data = super(RouteSerializer, self).validate(attrs=attrs)
         error = Route.validate_route(
             attrs["destination"],
             attrs["distance"],
             attrs["source"],
+            self.instance_pk,
         )
         if error:
             raise ValidationError(error)
@@ -56,7 +75,7 @@ class RouteSerializer(serializers.ModelSerializer):
         fields = ("id", "source", "destination", "distance")
 
 
-class FlightSerializer(serializers.ModelSerializer):
+class FlightSerializer(ValidatedModelSerializer):
     def validate(self, attrs):
         data = super(FlightSerializer, self).validate(attrs=attrs)
         error = Flight.validate_route(
@@ -64,6 +83,7 @@ class FlightSerializer(serializers.ModelSerializer):
             attrs["airplane"],
             attrs["departure_time"],
             attrs["arrival_time"],
+            self.instance_pk,
         )
         if error:
             raise ValidationError(error)
@@ -74,7 +94,63 @@ class FlightSerializer(serializers.ModelSerializer):
         fields = ("id", "route", "airplane", "departure_time", "arrival_time")
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class FlightListSerializer(FlightSerializer):
+    capacity = serializers.IntegerField(read_only=True)
+    tickets_available = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Flight
+        fields = (
+            "id",
+            "route",
+            "airplane",
+            "departure_time",
+            "arrival_time",
+            "capacity",
+            "tickets_available",
+        )
+
+
+class FlightSeatMapSerializer(serializers.ModelSerializer):
+    rows = serializers.IntegerField(source="airplane.rows", read_only=True)
+    seats_in_row = serializers.IntegerField(
+        source="airplane.seats_in_row", read_only=True
+    )
+    available = serializers.SerializerMethodField()
+    occupied = serializers.SerializerMethodField(
+        help_text=(
+            "Base64 bitmap of occupied seats, seat (row, seat) is bit "
+            "(row - 1) * seats_in_row + seat - 1, least significant bit "
+            "of each byte first."
+        )
+    )
+
+    class Meta:
+        model = Flight
+        fields = ("id", "rows", "seats_in_row", "available", "occupied")
+
+    def get_available(self, obj) -> int:
+        return obj.seat_map.available_count()
+
+    def get_occupied(self, obj) -> str:
+        return base64.b64encode(bytes(obj.seat_map)).decode()
+
+
+class FlightPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolve every flight once per request, not once per ticket."""
+
+    def to_internal_value(self, data):
+        flights = self.root.__dict__.setdefault("_flights", {})
+        if str(data) not in flights:
+            flights[str(data)] = super().to_internal_value(data)
+        return flights[str(data)]
+
+
+class TicketSerializer(ValidatedModelSerializer):
+    flight = FlightPrimaryKeyRelatedField(
+        queryset=Flight.objects.select_related("airplane")
+    )
+
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         errors = Ticket.validate_ticket(
@@ -98,10 +174,60 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = ("id", "tickets", "created_at",)
 
+    def validate_tickets(self, tickets):
+        places = [
+            (ticket["flight"].id, ticket["row"], ticket["seat"])
+            for ticket in tickets
+        ]
+        if len(places) != len(set(places)):
+            raise ValidationError(
+                "The same place cannot be ordered more than once."
+            )
+        return tickets
+
+    def create(self, validated_data):
+        tickets_data = validated_data.pop("tickets")
+        return create_order(tickets_data, **validated_data)
+
+
+class HeldSeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatHoldSerializer(serializers.Serializer):
+    reference = serializers.UUIDField(read_only=True)
+    flight = FlightPrimaryKeyRelatedField(
+        queryset=Flight.objects.select_related("airplane")
+    )
+    seats = HeldSeatSerializer(many=True, allow_empty=False)
+    minutes = serializers.IntegerField(
+        write_only=True,
+        min_value=1,
+        max_value=getattr(settings, "SEAT_HOLD_MAX_MINUTES", 30),
+        default=getattr(settings, "SEAT_HOLD_MINUTES", 10),
+    )
+    expires_at = serializers.DateTimeField(read_only=True)
+
+    def validate(self, attrs):
+        flight = attrs["flight"]
+        places = [(seat["row"], seat["seat"]) for seat in attrs["seats"]]
+        if len(places) != len(set(places)):
+            raise ValidationError(
+                {"seats": "The same place cannot be held more than once."}
+            )
+        errors = [
+            Ticket.validate_ticket(row, seat, flight) for row, seat in places
+        ]
+        if any(errors):
+            raise ValidationError({"seats": errors})
+        attrs["seats"] = places
+        return attrs
+
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
-            return order
+        return hold_seats(
+            self.context["request"].user,
+            validated_data["flight"],
+            validated_data["seats"],
+            validated_data["minutes"],
+        )
@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from airport import cache, itinerary
+from airport.booking import reconcile_flights
+from airport.models import (
+    Crew,
+    AirplaneType,
+    Airplane,
+    Airport,
+    Route,
+    Flight,
+    Ticket,
+)
+
+CACHED_MODELS = (Crew, AirplaneType, Airplane, Airport, Route)
+
+
+# The seat bitmaps index seats by the airplane's rows and seats_in_row,
+# so they are rebuilt from the tickets when the layout changes.
+@receiver(pre_save, sender=Airplane)
+def check_airplane_layout(sender, instance, **kwargs):
+    instance._layout_changed = not instance._state.adding and (
+        Airplane.objects.filter(pk=instance.pk).exclude(
+            rows=instance.rows, seats_in_row=instance.seats_in_row
+        ).exists()
+    )
+
+
+@receiver(post_save, sender=Airplane)
+def rebuild_airplane_seat_maps(sender, instance, **kwargs):
+    if getattr(instance, "_layout_changed", False):
+        reconcile_flights(Flight.objects.filter(airplane=instance))
+
+
+@receiver(pre_save, sender=Flight)
+def check_flight_airplane(sender, instance, **kwargs):
+    instance._layout_changed = not instance._state.adding and (
+        Flight.objects.filter(pk=instance.pk).exclude(
+            airplane_id=instance.airplane_id
+        ).exists()
+    )
+
+
+@receiver(post_save, sender=Flight)
+def rebuild_flight_seat_map(sender, instance, **kwargs):
+    if getattr(instance, "_layout_changed", False):
+        reconcile_flights(Flight.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Ticket)
+def release_ticket_seat(sender, instance, **kwargs):
+    Flight.update_seat_map(
+        instance.flight_id,
+        release=[(instance.row, instance.seat)],
+    )
+
+
+def invalidate_cached_lists(sender, **kwargs):
+    # Bumped once the rows are visible to other connections, otherwise a
+    # concurrent read could cache the old rows under the new version.
+    transaction.on_commit(lambda: cache.invalidate(sender))
+
+
+for model in CACHED_MODELS:
+    post_save.connect(invalidate_cached_lists, sender=model)
+    post_delete.connect(invalidate_cached_lists, sender=model)
+
+
+# Connected after invalidate_cached_lists, so on commit the itinerary
+# index checks the Route list version that handler has just bumped.
+@receiver(post_save, sender=Route)
+def add_itinerary_route(sender, instance, **kwargs):
+    transaction.on_commit(lambda: itinerary.route_changed(route=instance))
+
+
+@receiver(post_delete, sender=Route)
+def remove_itinerary_route(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: itinerary.route_changed(deleted_id=pk))
@@ -0,0 +1,262 @@
+"""
+Streaming load and dump of dumpdata-style JSON fixtures.
+
+Unlike loaddata, load_snapshot() never holds more than one batch of
+objects in memory and inserts them with bulk_create, so Model.save() and
+its clean() validation are skipped unless ``validate`` is set. Dumps are
+written model by model in primary key chunks.
+"""
+import json
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.serializers.python import Deserializer
+from django.db import connections, router, transaction
+
+from airport import cache
+from airport.booking import reconcile_flights
+from airport.models import Flight, Ticket
+from airport.validation import validation_scope
+
+SNAPSHOT_BATCH_SIZE = 1000
+READ_SIZE = 1 << 16
+
+_whitespace = re.compile(r"[\s,]*")
+
+
+def iter_json_array(stream, read_size=READ_SIZE):
+    """Yield the items of a JSON array read incrementally from a stream."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    eof = False
+    while True:
+        position = _whitespace.match(buffer, position).end()
+        if not started and position < len(buffer):
+            if buffer[position] != "[":
+                raise ValueError("A snapshot must be a JSON array.")
+            started = True
+            position += 1
+            continue
+        if started and buffer.startswith("]", position):
+            return
+
+        item = None
+        if started and position < len(buffer):
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+        if item is not None:
+            yield item
+            continue
+
+        if eof:
+            raise ValueError("Unexpected end of the snapshot.")
+        chunk = stream.read(read_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+@contextmanager
+def fixture_timestamps(model):
+    """Keep the fixture values of auto_now and auto_now_add fields.
+
+    bulk_create() runs pre_save() of every field, which would set them to
+    the load time. Loads run from a management command, so switching the
+    flags off for a moment does not affect requests.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False)
+        or getattr(field, "auto_now_add", False)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class SnapshotLoader:
+    def __init__(self, using, batch_size, validate):
+        self.connection = connections[using]
+        self.using = using
+        self.batch_size = batch_size
+        self.validate = validate
+        self.loaded = Counter()
+        self.batch = []
+
+    def add(self, deserialized):
+        model = type(deserialized.object)
+        if not router.allow_migrate_model(self.using, model):
+            return
+        if self.batch and type(self.batch[0].object) is not model:
+            self.flush()
+        if self.validate:
+            # Fixture rows may already exist, validate them as updates.
+            deserialized.object._state.adding = deserialized.object.pk is None
+            deserialized.object.full_clean(
+                validate_unique=False, validate_constraints=False
+            )
+        self.batch.append(deserialized)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        model = type(self.batch[0].object)
+        opts = model._meta
+        # Django 4.1.0 puts update_fields into the SQL as they are given,
+        # attnames match the column names of foreign keys as well.
+        update_fields = [
+            field.attname for field in opts.concrete_fields
+            if not field.primary_key
+        ]
+        with fixture_timestamps(model):
+            model.objects.using(self.using).bulk_create(
+                [deserialized.object for deserialized in self.batch],
+                update_conflicts=bool(update_fields),
+                ignore_conflicts=not update_fields,
+                update_fields=update_fields or None,
+                unique_fields=[opts.pk.name] if update_fields else None,
+            )
+
+        for field in opts.many_to_many:
+            through = field.remote_field.through
+            if not through._meta.auto_created:
+                continue
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            rows = [
+                (deserialized.object.pk, related_pk)
+                for deserialized in self.batch
+                if field.name in deserialized.m2m_data
+                for related_pk in deserialized.m2m_data[field.name]
+            ]
+            through.objects.using(self.using).filter(**{
+                f"{source}_id__in": [
+                    deserialized.object.pk for deserialized in self.batch
+                    if field.name in deserialized.m2m_data
+                ]
+            }).delete()
+            through.objects.using(self.using).bulk_create([
+                through(**{f"{source}_id": pk, f"{target}_id": related_pk})
+                for pk, related_pk in rows
+            ])
+
+        self.loaded[model] += len(self.batch)
+        self.batch = []
+
+    def finish(self):
+        models = list(self.loaded)
+        self.connection.check_constraints(
+            table_names=[model._meta.db_table for model in models]
+        )
+        sequence_sql = self.connection.ops.sequence_reset_sql(
+            no_style(), models
+        )
+        with self.connection.cursor() as cursor:
+            for sql in sequence_sql:
+                cursor.execute(sql)
+
+
+def load_snapshot(stream, batch_size=SNAPSHOT_BATCH_SIZE, validate=False,
+                  using="default") -> Counter:
+    """Load a JSON fixture from a stream and return the rows per model.
+
+    Existing rows with the same primary key are overwritten, as with
+    loaddata. Foreign keys are checked once at the end, so the fixture
+    does not have to be ordered by dependency. With ``validate`` every
+    object runs full_clean() in one shared validation scope.
+    """
+    loader = SnapshotLoader(using, batch_size, validate)
+    connection = connections[using]
+    with transaction.atomic(using=using), validation_scope():
+        with connection.constraint_checks_disabled():
+            for item in iter_json_array(stream):
+                for deserialized in Deserializer(
+                    [item], using=using, ignorenonexistent=True
+                ):
+                    loader.add(deserialized)
+            loader.flush()
+        loader.finish()
+        if Flight in loader.loaded or Ticket in loader.loaded:
+            reconcile_flights(Flight.objects.using(using))
+
+    # Bulk inserts bypass the post_save handlers of airport.signals.
+    for model in loader.loaded:
+        cache.invalidate(model)
+    return loader.loaded
+
+
+def snapshot_models(labels=("user", "airport")) -> list:
+    """Resolve app labels and app_label.Model names in dependency order."""
+    app_list = {}
+    for label in labels:
+        if "." in label:
+            model = apps.get_model(label)
+            app_list.setdefault(model._meta.app_config, [])
+            if app_list[model._meta.app_config] is not None:
+                app_list[model._meta.app_config].append(model)
+        else:
+            app_list[apps.get_app_config(label)] = None
+    return serializers.sort_dependencies(
+        [
+            (app_config, models if models is not None else list(
+                app_config.get_models()
+            ))
+            for app_config, models in app_list.items()
+        ],
+        allow_cycles=True,
+    )
+
+
+def dump_snapshot(stream, models, batch_size=SNAPSHOT_BATCH_SIZE,
+                  using="default") -> Counter:
+    """Write the rows of ``models`` to a stream as a JSON fixture.
+
+    Rows are read in primary key chunks of ``batch_size`` with their
+    many-to-many ids prefetched, and written one object per line.
+    """
+    dumped = Counter()
+    separator = "\n"
+    stream.write("[")
+    for model in models:
+        if model._meta.proxy or not router.allow_migrate_model(using, model):
+            continue
+        queryset = model._base_manager.using(using).order_by("pk")
+        m2m_fields = [
+            field.name for field in model._meta.many_to_many
+            if field.remote_field.through._meta.auto_created
+        ]
+        if m2m_fields:
+            queryset = queryset.prefetch_related(*m2m_fields)
+        last_pk = None
+        while True:
+            chunk = queryset
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            chunk = list(chunk[:batch_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            for item in serializers.serialize("python", chunk):
+                stream.write(separator)
+                stream.write(json.dumps(item, cls=DjangoJSONEncoder))
+                separator = ",\n"
+            dumped[model] += len(chunk)
+    stream.write("\n]\n")
+    return dumped
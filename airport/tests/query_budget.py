@@ -0,0 +1,123 @@
+from abc import ABC, abstractmethod
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, reverse
+
+from airport.urls import urlpatterns as airport_urlpatterns
+from user.urls import urlpatterns as user_urlpatterns
+
+SIZES = (10, 100, 1000)
+
+
+def _walk(urlpatterns):
+    for pattern in urlpatterns:
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns)
+        else:
+            yield pattern
+
+
+def registered_get_routes() -> dict:
+    """Map every DRF route of the airport and user apps answering GET to
+    the names of its URL arguments.
+
+    List, detail and extra actions are all included, format suffix
+    variants are not. The async views are not DRF views and are left out.
+    """
+    routes = {}
+    for namespace, urlpatterns in (
+        ("airport", airport_urlpatterns),
+        ("user", user_urlpatterns),
+    ):
+        for pattern in _walk(urlpatterns):
+            view_class = getattr(pattern.callback, "cls", None)
+            arguments = tuple(pattern.pattern.regex.groupindex)
+            if view_class is None or "format" in arguments:
+                continue
+            actions = getattr(pattern.callback, "actions", None)
+            if actions is None:
+                answers_get = hasattr(view_class, "get")
+            else:
+                answers_get = "get" in actions
+            if answers_get:
+                routes[f"{namespace}:{pattern.name}"] = arguments
+    return routes
+
+
+class QueryBudgetMixin(ABC):
+    """Check that the registered endpoints run a bounded number of queries.
+
+    Subclasses declare ``budgets`` (route name -> max queries), implement
+    ``seed(count)`` to add ``count`` rows of test data and, for routes
+    with URL arguments or required query parameters, override
+    ``route_arguments(name)``. Every route is requested at each of
+    ``sizes`` total rows; a route fails when its query count changes with
+    the data size or exceeds its budget.
+    """
+
+    budgets = {}
+    sizes = SIZES
+    query_params = {"page_size": 100}
+
+    @abstractmethod
+    def seed(self, count):
+        """Add ``count`` rows of test data."""
+
+    def route_arguments(self, name) -> tuple:
+        """Return the URL kwargs and the query parameters to request the
+        route ``name`` with."""
+        return {}, {}
+
+    def route_url(self, name, arguments) -> tuple:
+        kwargs, params = self.route_arguments(name)
+        missing = sorted(set(arguments) - set(kwargs))
+        self.assertFalse(missing, f"Declare {missing} arguments for {name}")
+        return reverse(name, kwargs=kwargs), {**self.query_params, **params}
+
+    def measure(self, url, params) -> dict:
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+            if response.streaming:
+                # Streamed rows are queried while the body is consumed.
+                b"".join(response.streaming_content)
+        self.assertLess(response.status_code, 400, url)
+        return {
+            "queries": len(queries),
+            "db_time": sum(
+                float(query["time"]) for query in queries.captured_queries
+            ),
+        }
+
+    def assert_query_budgets(self) -> dict:
+        routes = registered_get_routes()
+        missing = sorted(set(routes) - set(self.budgets))
+        self.assertFalse(missing, f"Declare query budgets for {missing}")
+
+        results = {name: {} for name in routes}
+        seeded = 0
+        for size in self.sizes:
+            self.seed(size - seeded)
+            seeded = size
+            for name, arguments in routes.items():
+                results[name][size] = self.measure(
+                    *self.route_url(name, arguments)
+                )
+
+        for name, by_size in results.items():
+            counts = {
+                size: result["queries"] for size, result in by_size.items()
+            }
+            self.assertEqual(
+                len(set(counts.values())),
+                1,
+                f"{name} queries grow with the data size: {counts}",
+            )
+            self.assertLessEqual(
+                max(counts.values()),
+                self.budgets[name],
+                f"{name} exceeds its query budget: {counts}",
+            )
+        return results
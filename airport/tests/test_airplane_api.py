@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -25,6 +26,7 @@ def sample_airplane(**params) -> Airplane:
 
 class UnauthenticatedAirplaneApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_auth_required(self):
@@ -34,6 +36,7 @@ class UnauthenticatedAirplaneApiTests(TestCase):
 
 class AuthenticatedAirplaneApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="test_user@test.com",
@@ -47,7 +50,7 @@ class AuthenticatedAirplaneApiTests(TestCase):
         serializer = AirplaneSerializer(airplanes, many=True)
         res = self.client.get(AIRPLANE_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_create_airplane_forbidden(self):
         AirplaneType.objects.create(name="Passenger")
@@ -63,6 +66,7 @@ class AuthenticatedAirplaneApiTests(TestCase):
 
 class AdminAirplaneTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="admin@admin.com",
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -21,6 +22,7 @@ def sample_airplane_type(**params) -> AirplaneType:
 
 class UnauthenticatedAirplaneTypeApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_auth_required(self):
@@ -30,6 +32,7 @@ class UnauthenticatedAirplaneTypeApiTests(TestCase):
 
 class AuthenticatedAirplaneTypeApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="test_user@test.com",
@@ -43,7 +46,7 @@ class AuthenticatedAirplaneTypeApiTests(TestCase):
         serializer = AirplaneTypeSerializer(airplane_type, many=True)
         res = self.client.get(AIRPLANE_TYPES_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_create_airplane_type_forbidden(self):
         payload = {
@@ -55,6 +58,7 @@ class AuthenticatedAirplaneTypeApiTests(TestCase):
 
 class AdminCrewTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="admin@admin.com",
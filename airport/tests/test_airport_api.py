@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -22,6 +23,7 @@ def sample_airport(**params) -> Airport:
 
 class UnauthenticatedAirportApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_auth_required(self):
@@ -31,6 +33,7 @@ class UnauthenticatedAirportApiTests(TestCase):
 
 class AuthenticatedAirportApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="test_user@test.com",
@@ -48,7 +51,7 @@ class AuthenticatedAirportApiTests(TestCase):
         serializer = AirportSerializer(airports, many=True)
         res = self.client.get(AIRPORT_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_create_crew_forbidden(self):
         payload = {
@@ -61,6 +64,7 @@ class AuthenticatedAirportApiTests(TestCase):
 
 class AdminAirportTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="admin@admin.com",
@@ -0,0 +1,150 @@
+import base64
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from rest_framework.reverse import reverse
+from rest_framework import status, throttling
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.models import Order, Ticket
+from airport.tests.test_airport_api import sample_airport
+from airport.tests.test_flight_api import sample_flight
+from airport_service.metrics import registry
+
+ASYNC_FLIGHT_URL = reverse("airport:async-flight-list")
+ASYNC_AIRPORT_URL = reverse("airport:async-airport-list")
+
+sample_flight_async = sync_to_async(sample_flight)
+sample_airport_async = sync_to_async(sample_airport)
+
+
+def async_seats_url(flight_id):
+    return reverse("airport:async-flight-seats", args=[flight_id])
+
+
+class AsyncViewsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test_user@test.com",
+            password="testpassword"
+        )
+        self.authorization = f"Bearer {AccessToken.for_user(self.user)}"
+
+    def create_committed_airport(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sample_airport(name="Lviv International Airport")
+
+    async def get(self, url, data=None, **extra):
+        return await self.async_client.get(
+            url, data, authorization=self.authorization, **extra
+        )
+
+    async def test_auth_required(self):
+        res = await self.async_client.get(ASYNC_FLIGHT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("WWW-Authenticate", res.headers)
+
+    async def test_invalid_token(self):
+        res = await self.async_client.get(
+            ASYNC_FLIGHT_URL, authorization="Bearer invalid"
+        )
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_flight_list_matches_sync_list(self):
+        for _ in range(3):
+            await sample_flight_async()
+        sync_res = await self.async_client.get(
+            reverse("airport:flight-list"),
+            {"page_size": 2},
+            authorization=self.authorization,
+        )
+        res = await self.get(ASYNC_FLIGHT_URL, {"page_size": 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        data = res.json()
+        self.assertEqual(data["results"], sync_res.json()["results"])
+
+        res = await self.async_client.get(
+            data["next"], authorization=self.authorization
+        )
+        data = res.json()
+        self.assertEqual(len(data["results"]), 1)
+        self.assertIsNone(data["next"])
+
+    async def test_flight_list_invalid_filter(self):
+        res = await self.get(ASYNC_FLIGHT_URL, {"source": "abc"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("source", res.json())
+
+    async def test_flight_detail(self):
+        flight = await sample_flight_async()
+        res = await self.get(
+            reverse("airport:async-flight-detail", args=[flight.id])
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["id"], flight.id)
+
+        res = await self.get(
+            reverse("airport:async-flight-detail", args=[flight.id + 1])
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_flight_seats_with_conditional_get(self):
+        flight = await sample_flight_async()
+        order = await Order.objects.acreate(user=self.user)
+        await Ticket.objects.acreate(
+            row=1, seat=2, flight=flight, order=order
+        )
+        res = await self.get(async_seats_url(flight.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        data = res.json()
+        self.assertEqual(data["available"], 399)
+        self.assertEqual(base64.b64decode(data["occupied"])[0], 0b10)
+
+        res = await self.get(
+            async_seats_url(flight.id), **{"if-none-match": res["ETag"]}
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_airport_list_is_cached(self):
+        registry.reset()
+        await sample_airport_async()
+        res = await self.get(ASYNC_AIRPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()["results"]), 1)
+        await self.get(ASYNC_AIRPORT_URL)
+        self.assertEqual(registry.cache, {"miss": 1, "hit": 1})
+
+        await sync_to_async(self.create_committed_airport)()
+        res = await self.get(ASYNC_AIRPORT_URL)
+        self.assertEqual(len(res.json()["results"]), 2)
+
+
+    @mock.patch.object(
+        throttling.SimpleRateThrottle,
+        "THROTTLE_RATES",
+        {"anon": "1/min", "user": "2/min", "flights": "3/min"},
+    )
+    async def test_requests_are_throttled_like_the_viewsets(self):
+        for _ in range(2):
+            res = await self.get(ASYNC_AIRPORT_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = await self.get(ASYNC_AIRPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res.headers)
+
+        # Flights are limited by their own scope instead of the user rate.
+        for _ in range(3):
+            res = await self.get(ASYNC_FLIGHT_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = await self.get(ASYNC_FLIGHT_URL)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = await self.async_client.get(ASYNC_FLIGHT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        res = await self.async_client.get(ASYNC_FLIGHT_URL)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
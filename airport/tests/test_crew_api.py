@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -22,6 +23,7 @@ def sample_crew(**params) -> Crew:
 
 class UnauthenticatedCrewApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_auth_required(self):
@@ -31,6 +33,7 @@ class UnauthenticatedCrewApiTests(TestCase):
 
 class AuthenticatedCrewApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="test_user@test.com",
@@ -44,7 +47,7 @@ class AuthenticatedCrewApiTests(TestCase):
         serializer = CrewSerializer(crews, many=True)
         res = self.client.get(CREW_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_create_crew_forbidden(self):
         payload = {
@@ -57,6 +60,7 @@ class AuthenticatedCrewApiTests(TestCase):
 
 class AdminCrewTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="admin@admin.com",
@@ -0,0 +1,122 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework.reverse import reverse
+from rest_framework import status
+
+from airport.models import Flight
+from airport.tests.test_flight_api import sample_flight
+from airport_service import db_router
+from airport_service.db_router import (
+    ReplicaRouter,
+    is_pinned,
+    pin_user,
+    replica_is_healthy,
+    request_routing,
+)
+
+ORDER_URL = reverse("airport:order-list")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+@mock.patch.object(db_router, "replica_is_healthy", return_value=True)
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        db_router.get_pin_cache().clear()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.user = get_user_model().objects.create_user(
+            email="test_user@test.com",
+            password="testpassword"
+        )
+
+    def read_alias(self, method="get", user=None):
+        request = getattr(self.factory, method)("/")
+        if user is not None:
+            request.user = user
+        # TestCase runs every test in a transaction, which reads from the
+        # primary, so leave it for the routing decision.
+        with request_routing(request), mock.patch.object(
+            transaction.get_connection(), "in_atomic_block", False
+        ):
+            return self.router.db_for_read(Flight)
+
+    def test_reads_outside_requests_use_primary(self, healthy):
+        self.assertEqual(self.router.db_for_read(Flight), "default")
+
+    def test_safe_request_reads_use_replica(self, healthy):
+        self.assertEqual(self.read_alias(user=self.user), "replica")
+
+    def test_unsafe_request_reads_use_primary(self, healthy):
+        self.assertEqual(self.read_alias("post"), "default")
+
+    def test_reads_in_transaction_use_primary(self, healthy):
+        request = self.factory.get("/")
+        with request_routing(request), mock.patch.object(
+            transaction.get_connection(), "in_atomic_block", True
+        ):
+            self.assertEqual(self.router.db_for_read(Flight), "default")
+
+    def test_pinned_user_reads_use_primary(self, healthy):
+        pin_user(self.user)
+        self.assertEqual(self.read_alias(user=self.user), "default")
+        other = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="testpassword"
+        )
+        self.assertEqual(self.read_alias(user=other), "replica")
+
+    def test_unhealthy_replica_falls_back_to_primary(self, healthy):
+        healthy.return_value = False
+        self.assertEqual(self.read_alias(user=self.user), "default")
+
+    def test_writes_use_primary(self, healthy):
+        self.assertEqual(self.router.db_for_write(Flight), "default")
+
+    def test_order_creation_pins_user(self, healthy):
+        flight = sample_flight()
+        admin = get_user_model().objects.create_user(
+            email="admin@admin.com",
+            password="testpassword",
+            is_staff=True,
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        res = client.post(
+            ORDER_URL,
+            {"tickets": [{"flight": flight.id, "row": 1, "seat": 1}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(is_pinned(admin.pk))
+        self.assertFalse(is_pinned(self.user.pk))
+
+
+@override_settings(REPLICA_MAX_LAG_SECONDS=5, REPLICA_HEALTH_CHECK_INTERVAL=60)
+class ReplicaHealthTests(TestCase):
+    def setUp(self):
+        db_router._health.clear()
+
+    def test_lagging_replica_is_unhealthy(self):
+        with mock.patch.object(db_router, "replica_lag", return_value=30):
+            self.assertFalse(replica_is_healthy("replica"))
+
+    def test_unreachable_replica_is_unhealthy(self):
+        with mock.patch.object(
+            db_router, "replica_lag", side_effect=DatabaseError
+        ):
+            self.assertFalse(replica_is_healthy("replica"))
+
+    def test_health_is_checked_once_per_interval(self):
+        with mock.patch.object(
+            db_router, "replica_lag", return_value=0
+        ) as replica_lag:
+            self.assertTrue(replica_is_healthy("replica"))
+            self.assertTrue(replica_is_healthy("replica"))
+        replica_lag.assert_called_once_with("replica")
@@ -0,0 +1,122 @@
+import csv
+import json
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework.reverse import reverse
+from rest_framework import status
+
+from airport.models import Order, Ticket
+from airport.tests.test_flight_api import sample_flight
+
+
+def export_url(dataset, export_format):
+    return reverse(
+        "airport:export",
+        kwargs={"dataset": dataset, "export_format": export_format},
+    )
+
+
+def sample_ticket_order(user, flight, created_at, seats) -> Order:
+    order = Order.objects.create(user=user)
+    Order.objects.filter(pk=order.pk).update(created_at=created_at)
+    for seat in seats:
+        Ticket.objects.create(order=order, flight=flight, row=1, seat=seat)
+    return order
+
+
+class ExportApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@admin.com",
+            password="testpassword",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        flight = sample_flight()
+        self.may_order = sample_ticket_order(
+            self.user, flight, datetime(2024, 5, 31, 23, tzinfo=timezone.utc),
+            [1, 2],
+        )
+        self.june_order = sample_ticket_order(
+            self.user, flight, datetime(2024, 6, 30, 23, tzinfo=timezone.utc),
+            [3],
+        )
+
+    @staticmethod
+    def read_csv(res):
+        content = b"".join(res.streaming_content).decode()
+        return list(csv.DictReader(StringIO(content)))
+
+    def test_export_requires_staff(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test_user@test.com",
+                password="testpassword",
+            )
+        )
+        res = self.client.get(export_url("tickets", "csv"))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_tickets_csv(self):
+        res = self.client.get(
+            export_url("tickets", "csv"), HTTP_ACCEPT="text/csv"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "text/csv; charset=utf-8")
+        rows = self.read_csv(res)
+        self.assertEqual(
+            [(row["order_id"], row["seat"]) for row in rows],
+            [
+                (str(self.may_order.id), "1"),
+                (str(self.may_order.id), "2"),
+                (str(self.june_order.id), "3"),
+            ],
+        )
+        self.assertEqual(rows[0]["user_email"], self.user.email)
+
+    def test_export_orders_ndjson(self):
+        res = self.client.get(export_url("orders", "ndjson"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        orders = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [(order["order_id"], order["tickets"]) for order in orders],
+            [(self.may_order.id, 2), (self.june_order.id, 1)],
+        )
+
+    def test_export_filtered_by_created_at(self):
+        res = self.client.get(
+            export_url("tickets", "csv"),
+            {"created_from": "2024-06-01", "created_to": "2024-06-30"},
+        )
+        rows = self.read_csv(res)
+        self.assertEqual(
+            [row["order_id"] for row in rows], [str(self.june_order.id)]
+        )
+
+    def test_export_invalid_date(self):
+        res = self.client.get(
+            export_url("tickets", "csv"), {"created_from": "June"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command(
+            "export", "tickets", "--to", "2024-05-31", "--chunk-size", "1",
+            stdout=out,
+        )
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual(
+            [row["seat"] for row in rows], ["1", "2"]
+        )
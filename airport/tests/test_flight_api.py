@@ -1,33 +1,55 @@
+import base64
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from datetime import datetime, timezone
+from io import StringIO
 
 from rest_framework.test import APIClient
 from rest_framework.reverse import reverse
 from rest_framework import status
 
-from airport.models import Route, Flight
-from airport.serializers import FlightSerializer
+from airport.models import (
+    Route,
+    Flight,
+    Airport,
+    AirplaneType,
+    Order,
+    Ticket,
+)
+from airport.serializers import FlightListSerializer
 from airport.tests.test_airplane_api import sample_airplane
 from airport.tests.test_route_api import sample_route
 
 FLIGHT_URL = reverse("airport:flight-list")
+CONNECTIONS_URL = reverse("airport:flight-connections")
+
+
+def seats_url(flight_id):
+    return reverse("airport:flight-seats", args=[flight_id])
 
 
-def sample_flight() -> Flight:
-    route = sample_route()
-    airplane = sample_airplane()
-    flight = Flight.objects.create(
-        route=route,
-        airplane=airplane,
-        departure_time=datetime(2024, 6, 1, 13, 15),
-        arrival_time=datetime(2024, 6, 1, 14, 30)
-    )
-    return flight
+def sample_flight(**params) -> Flight:
+    defaults = {
+        "departure_time": datetime(2024, 6, 1, 13, 15),
+        "arrival_time": datetime(2024, 6, 1, 14, 30),
+    }
+    defaults.update(params)
+    if "route" not in defaults:
+        defaults["route"] = sample_route()
+    if "airplane" not in defaults:
+        defaults["airplane"] = sample_airplane()
+    return Flight.objects.create(**defaults)
 
 
 class UnauthenticatedFlightApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_auth_required(self):
@@ -37,6 +59,7 @@ class UnauthenticatedFlightApiTests(TestCase):
 
 class AuthenticatedFlightApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="test_user@test.com",
@@ -46,11 +69,158 @@ class AuthenticatedFlightApiTests(TestCase):
 
     def test_flight_list(self):
         sample_flight()
-        flights = Flight.objects.all()
-        serializer = FlightSerializer(flights, many=True)
+        flights = Flight.objects.annotate(
+            capacity=F("airplane__rows") * F("airplane__seats_in_row"),
+            tickets_available=F("capacity") - F("seats_sold"),
+        )
+        serializer = FlightListSerializer(flights, many=True)
+        res = self.client.get(FLIGHT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], serializer.data)
+
+    def test_flight_list_cursor_pagination(self):
+        for _ in range(3):
+            sample_flight()
+        res = self.client.get(FLIGHT_URL, {"page_size": 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNone(res.data["previous"])
+
+        next_page = self.client.get(res.data["next"])
+        self.assertEqual(len(next_page.data["results"]), 1)
+        self.assertIsNone(next_page.data["next"])
+        ids = [
+            flight["id"]
+            for flight in res.data["results"] + next_page.data["results"]
+        ]
+        self.assertEqual(
+            ids,
+            list(
+                Flight.objects.order_by("departure_time", "id").
+                values_list("id", flat=True)
+            ),
+        )
+
+    def test_filter_flights_by_airports(self):
+        flight = sample_flight()
+        lviv = Airport.objects.create(name="LWO", closest_big_city="Lviv")
+        other = sample_flight(
+            route=Route.objects.create(
+                source=flight.route.source, destination=lviv, distance=470
+            )
+        )
+
+        res = self.client.get(
+            FLIGHT_URL, {"destination": str(flight.route.destination_id)}
+        )
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [flight.id]
+        )
+
+        res = self.client.get(
+            FLIGHT_URL, {"from_city": "kyiv", "to_city": "Lviv"}
+        )
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [other.id]
+        )
+
+        res = self.client.get(
+            FLIGHT_URL, {"source": f"{flight.route.source_id},{lviv.id}"}
+        )
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_filter_flights_by_departure_and_airplane_type(self):
+        june = sample_flight()
+        july = sample_flight(
+            departure_time=datetime(2024, 7, 1, 9, 0, tzinfo=timezone.utc),
+            arrival_time=datetime(2024, 7, 1, 11, 0, tzinfo=timezone.utc),
+            airplane=sample_airplane(
+                airplane_type=AirplaneType.objects.create(name="Cargo")
+            ),
+        )
+
+        res = self.client.get(
+            FLIGHT_URL,
+            {"departure_from": "2024-06-01", "departure_to": "2024-06-01"},
+        )
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [june.id]
+        )
+
+        res = self.client.get(
+            FLIGHT_URL,
+            {"airplane_type": str(july.airplane.airplane_type_id)},
+        )
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [july.id]
+        )
+
+    def test_filter_flights_invalid_params(self):
+        res = self.client.get(FLIGHT_URL, {"source": "abc"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(FLIGHT_URL, {"departure_from": "tomorrow"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filtered_flight_list_queries_are_bounded(self):
+        sample_flight()
+        with CaptureQueriesContext(connection) as single:
+            self.client.get(FLIGHT_URL, {"from_city": "Kyiv"})
+        for _ in range(5):
+            sample_flight()
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(FLIGHT_URL, {"from_city": "Kyiv"})
+        self.assertEqual(len(res.data["results"]), 6)
+        self.assertEqual(len(single), len(many))
+
+    def test_flight_list_tickets_available(self):
+        flight = sample_flight()
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=flight, order=order)
+        Ticket.objects.create(row=1, seat=2, flight=flight, order=order)
         res = self.client.get(FLIGHT_URL)
+        self.assertEqual(res.data["results"][0]["capacity"], 400)
+        self.assertEqual(res.data["results"][0]["tickets_available"], 398)
+
+    def test_flight_list_is_a_single_query(self):
+        for _ in range(10):
+            sample_flight()
+        with self.assertNumQueries(1):
+            res = self.client.get(FLIGHT_URL)
+        self.assertEqual(len(res.data["results"]), 10)
+
+    def test_flight_seat_map(self):
+        flight = sample_flight(
+            airplane=sample_airplane(rows=2, seats_in_row=5)
+        )
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=flight, order=order)
+        Ticket.objects.create(row=2, seat=4, flight=flight, order=order)
+        with self.assertNumQueries(1):
+            res = self.client.get(seats_url(flight.id))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["rows"], 2)
+        self.assertEqual(res.data["seats_in_row"], 5)
+        self.assertEqual(res.data["available"], 8)
+        bits = base64.b64decode(res.data["occupied"])
+        # Seats (1, 1) and (2, 4) are bits 0 and 8.
+        self.assertEqual(bits, bytes([0b00000001, 0b00000001]))
+
+    def test_flight_seat_map_not_modified(self):
+        flight = sample_flight()
+        res = self.client.get(seats_url(flight.id))
+        etag = res["ETag"]
+        res = self.client.get(seats_url(flight.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=flight, order=order)
+        res = self.client.get(seats_url(flight.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_flight_seat_map_not_found(self):
+        res = self.client.get(seats_url(1000))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_create_flight_forbidden(self):
         route = sample_route()
@@ -67,8 +237,154 @@ class AuthenticatedFlightApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
 
+class FlightConnectionsApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test_user@test.com",
+            password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        self.kyiv, self.lviv, self.warsaw, self.berlin = (
+            Airport.objects.create(name=name, closest_big_city=city)
+            for name, city in (
+                ("KBP", "Kyiv"),
+                ("LWO", "Lviv"),
+                ("WAW", "Warsaw"),
+                ("BER", "Berlin"),
+            )
+        )
+        self.kyiv_lviv = self.flight(self.kyiv, self.lviv, (8, 0), (9, 0))
+        self.lviv_warsaw = self.flight(
+            self.lviv, self.warsaw, (10, 0), (11, 30)
+        )
+        self.lviv_warsaw_early = self.flight(
+            self.lviv, self.warsaw, (9, 30), (10, 45)
+        )
+        self.kyiv_warsaw = self.flight(
+            self.kyiv, self.warsaw, (10, 0), (12, 0)
+        )
+        self.warsaw_berlin = self.flight(
+            self.warsaw, self.berlin, (13, 0), (15, 0)
+        )
+
+    @staticmethod
+    def flight(source, destination, departure, arrival, day=1) -> Flight:
+        route, _ = Route.objects.get_or_create(
+            source=source,
+            destination=destination,
+            defaults={"distance": 100 * source.id + destination.id},
+        )
+        return sample_flight(
+            route=route,
+            departure_time=datetime(
+                2024, 6, day, *departure, tzinfo=timezone.utc
+            ),
+            arrival_time=datetime(
+                2024, 6, day, *arrival, tzinfo=timezone.utc
+            ),
+        )
+
+    def connections(self, **params):
+        res = self.client.get(
+            CONNECTIONS_URL, {"date": "2024-06-01", **params}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [
+            [flight["id"] for flight in option["flights"]]
+            for option in res.data
+        ]
+
+    def test_direct_and_one_stop_options(self):
+        res = self.client.get(
+            CONNECTIONS_URL,
+            {
+                "source": self.kyiv.id,
+                "destination": self.warsaw.id,
+                "date": "2024-06-01",
+            },
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [
+                [flight["id"] for flight in option["flights"]]
+                for option in res.data
+            ],
+            [[self.kyiv_lviv.id, self.lviv_warsaw.id], [self.kyiv_warsaw.id]],
+        )
+        self.assertEqual(res.data[0]["stops"], 1)
+        self.assertEqual(res.data[0]["duration"], 210)
+        self.assertEqual(res.data[0]["flights"][1]["source"], self.lviv.id)
+        self.assertEqual(res.data[0]["flights"][1]["tickets_available"], 400)
+
+    def test_layover_window(self):
+        options = self.connections(
+            source=self.kyiv.id, destination=self.warsaw.id, min_layover=30
+        )
+        self.assertEqual(options[0], [
+            self.kyiv_lviv.id, self.lviv_warsaw_early.id
+        ])
+        self.assertEqual(len(options), 3)
+
+        options = self.connections(
+            source=self.kyiv.id, destination=self.warsaw.id, max_layover=59
+        )
+        self.assertEqual(options, [[self.kyiv_warsaw.id]])
+
+    def test_two_stop_options(self):
+        options = self.connections(
+            source=self.kyiv.id, destination=self.berlin.id
+        )
+        self.assertEqual(
+            options, [[self.kyiv_warsaw.id, self.warsaw_berlin.id]]
+        )
+
+        options = self.connections(
+            source=self.kyiv.id, destination=self.berlin.id, max_stops=2
+        )
+        self.assertEqual(options, [
+            [self.kyiv_warsaw.id, self.warsaw_berlin.id],
+            [self.kyiv_lviv.id, self.lviv_warsaw.id, self.warsaw_berlin.id],
+        ])
+
+    def test_connections_skip_other_days_and_full_flights(self):
+        self.flight(self.kyiv, self.warsaw, (7, 0), (8, 0), day=2)
+        self.kyiv_lviv.seats_sold = 400
+        self.kyiv_lviv.save()
+        options = self.connections(
+            source=self.kyiv.id, destination=self.warsaw.id
+        )
+        self.assertEqual(options, [[self.kyiv_warsaw.id]])
+
+    def test_connections_queries_are_bounded(self):
+        for hour in range(14, 20):
+            self.flight(self.warsaw, self.berlin, (hour, 0), (hour, 50))
+            self.flight(self.lviv, self.warsaw, (hour, 0), (hour, 50))
+        with self.assertNumQueries(3):
+            options = self.connections(
+                source=self.kyiv.id, destination=self.berlin.id, max_stops=2
+            )
+        self.assertEqual(len(options), 18)
+
+    def test_connections_invalid_params(self):
+        for params in (
+            {"destination": self.warsaw.id, "date": "2024-06-01"},
+            {"source": self.kyiv.id, "destination": self.kyiv.id,
+             "date": "2024-06-01"},
+            {"source": self.kyiv.id, "destination": self.warsaw.id},
+            {"source": self.kyiv.id, "destination": self.warsaw.id,
+             "date": "2024-06-01", "max_stops": 3},
+            {"source": self.kyiv.id, "destination": self.warsaw.id,
+             "date": "2024-06-01", "min_layover": 60, "max_layover": 30},
+        ):
+            res = self.client.get(CONNECTIONS_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class AdminFlightTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="admin@admin.com",
@@ -150,3 +466,54 @@ class AdminFlightTests(TestCase):
             res.data["departure_time"][0].code,
             "invalid"
         )
+
+
+class ReconcileSeatsCommandTests(TestCase):
+    def test_reconcile_seats(self):
+        flight = sample_flight()
+        order = Order.objects.create(
+            user=get_user_model().objects.create_user(
+                email="test_user@test.com",
+                password="testpassword"
+            )
+        )
+        Ticket.objects.bulk_create([
+            Ticket(row=1, seat=seat, flight=flight, order=order)
+            for seat in (1, 2, 3)
+        ])
+        flight.refresh_from_db()
+        self.assertEqual(flight.seats_sold, 0)
+
+        call_command("reconcile_seats", batch_size=1, stdout=StringIO())
+        flight.refresh_from_db()
+        self.assertEqual(flight.seats_sold, 3)
+        self.assertEqual(flight.seat_map.occupied_count(), 3)
+        self.assertTrue(flight.seat_map.is_occupied(1, 2))
+
+
+class SeatMapLayoutTests(TestCase):
+    def setUp(self):
+        self.flight = sample_flight()
+        order = Order.objects.create(
+            user=get_user_model().objects.create_user(
+                email="test_user@test.com",
+                password="testpassword"
+            )
+        )
+        Ticket.objects.create(row=2, seat=3, flight=self.flight, order=order)
+
+    def test_seat_map_rebuilt_when_airplane_layout_changes(self):
+        airplane = self.flight.airplane
+        airplane.seats_in_row = 4
+        airplane.save()
+        flight = Flight.objects.get(pk=self.flight.pk)
+        self.assertEqual(flight.seat_map.occupied_count(), 1)
+        self.assertTrue(flight.seat_map.is_occupied(2, 3))
+        self.assertEqual(flight.seats_sold, 1)
+
+    def test_seat_map_rebuilt_when_flight_airplane_changes(self):
+        self.flight.airplane = sample_airplane(rows=10, seats_in_row=3)
+        self.flight.save()
+        flight = Flight.objects.get(pk=self.flight.pk)
+        self.assertEqual(flight.seat_map.occupied_count(), 1)
+        self.assertTrue(flight.seat_map.is_occupied(2, 3))
@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework.reverse import reverse
+from rest_framework import status
+
+from airport.tests.test_airport_api import sample_airport
+from airport_service.metrics import registry, wrap_connections
+
+AIRPORT_URL = reverse("airport:airport-list")
+METRICS_URL = reverse("metrics")
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test_user@test.com",
+            password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_requests_are_recorded(self):
+        sample_airport()
+        self.client.get(AIRPORT_URL)
+        self.client.get(AIRPORT_URL)
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = res.content.decode()
+        self.assertIn(
+            'airport_request_duration_seconds_count'
+            '{view="airport:airport-list"} 2',
+            body,
+        )
+        self.assertIn(
+            'airport_responses_total{view="airport:airport-list",'
+            'method="GET",status="200"} 2',
+            body,
+        )
+        self.assertIn('airport_cache_requests_total{result="hit"} 1', body)
+        self.assertIn('airport_cache_requests_total{result="miss"} 1', body)
+        self.assertIn(
+            'airport_db_queries_total{view="airport:airport-list"} 1', body
+        )
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_metrics_forbidden_for_other_clients(self):
+        self.client.logout()
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_every_database_alias_is_wrapped(self):
+        wrapper = object()
+        with wrap_connections(wrapper):
+            for alias in connections:
+                self.assertIn(wrapper, connections[alias].execute_wrappers)
+        for alias in connections:
+            self.assertNotIn(wrapper, connections[alias].execute_wrappers)
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+BEFORE = [("airport", "0002_flight_occupied_seats")]
+CONSTRAINT = [("airport", "0003_ticket_unique_flight_row_seat")]
+
+
+class UniqueTicketMigrationTests(TransactionTestCase):
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.latest = self.executor.loader.graph.leaf_nodes("airport")
+        self.executor.migrate(BEFORE)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.latest)
+
+    def seed_tickets(self, places) -> list:
+        apps = self.executor.loader.project_state(BEFORE).apps
+        Airport = apps.get_model("airport", "Airport")
+        AirplaneType = apps.get_model("airport", "AirplaneType")
+        Airplane = apps.get_model("airport", "Airplane")
+        Route = apps.get_model("airport", "Route")
+        Flight = apps.get_model("airport", "Flight")
+        Order = apps.get_model("airport", "Order")
+        Ticket = apps.get_model("airport", "Ticket")
+        User = apps.get_model("user", "User")
+
+        source = Airport.objects.create(name="KBP", closest_big_city="Kyiv")
+        destination = Airport.objects.create(
+            name="LWO", closest_big_city="Lviv"
+        )
+        airplane = Airplane.objects.create(
+            name="Boeing",
+            rows=10,
+            seats_in_row=4,
+            airplane_type=AirplaneType.objects.create(name="Passenger"),
+        )
+        flight = Flight.objects.create(
+            route=Route.objects.create(
+                source=source, destination=destination, distance=500
+            ),
+            airplane=airplane,
+            departure_time=datetime(2025, 1, 1, 8, tzinfo=timezone.utc),
+            arrival_time=datetime(2025, 1, 1, 10, tzinfo=timezone.utc),
+        )
+        order = Order.objects.create(
+            user=User.objects.create(email="test_user@test.com")
+        )
+        return [
+            Ticket.objects.create(
+                order=order, flight=flight, row=row, seat=seat
+            ).id
+            for row, seat in places
+        ]
+
+    def migrate_forward(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(CONSTRAINT)
+
+    def test_unique_tickets_migrate(self):
+        self.seed_tickets([(1, 1), (1, 2)])
+        self.migrate_forward()
+
+    def test_duplicate_tickets_abort_with_their_ids(self):
+        ticket_ids = self.seed_tickets([(1, 1), (1, 1), (1, 2)])
+        with self.assertRaisesMessage(
+            RuntimeError, f"{ticket_ids[0]}, {ticket_ids[1]}"
+        ):
+            self.migrate_forward()
+
+        # Once all but one ticket of the seat are gone, it migrates.
+        apps = self.executor.loader.project_state(BEFORE).apps
+        apps.get_model("airport", "Ticket").objects.filter(
+            pk=ticket_ids[1]
+        ).delete()
+        self.migrate_forward()
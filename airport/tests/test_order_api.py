@@ -1,11 +1,14 @@
+from django.db import connection
+from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 
 from rest_framework.test import APIClient
 from rest_framework.reverse import reverse
 from rest_framework import status
 
-from airport.models import Order
+from airport.models import Order, Flight, Ticket
 from airport.serializers import OrderSerializer
 from airport.tests.test_flight_api import sample_flight
 
@@ -22,6 +25,7 @@ def sample_order(**params) -> Order:
 
 class UnauthenticatedOrderApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_auth_required(self):
@@ -31,6 +35,7 @@ class UnauthenticatedOrderApiTests(TestCase):
 
 class AuthenticatedOrderApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="test_user@test.com",
@@ -46,11 +51,29 @@ class AuthenticatedOrderApiTests(TestCase):
                 password="TestPassword123",
             )
         )
-        orders = Order.objects.all()
+        orders = Order.objects.filter(user=self.user)
         serializer = OrderSerializer(orders, many=True)
         res = self.client.get(ORDER_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_order_list_queries_do_not_grow_with_orders(self):
+        flight = sample_flight()
+
+        def add_order(seat):
+            order = sample_order(user=self.user)
+            Ticket.objects.create(row=1, seat=seat, flight=flight, order=order)
+
+        add_order(1)
+        with CaptureQueriesContext(connection) as single:
+            self.client.get(ORDER_URL)
+        for seat in range(2, 8):
+            add_order(seat)
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(ORDER_URL)
+        self.assertEqual(len(res.data["results"]), 7)
+        self.assertEqual(len(single), len(many))
 
     def test_create_order_forbidden(self):
         payload = {
@@ -62,6 +85,7 @@ class AuthenticatedOrderApiTests(TestCase):
 
 class AdminOrderTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="admin@admin.com",
@@ -98,3 +122,76 @@ class AdminOrderTests(TestCase):
         }
         res = self.client.post(path=ORDER_URL, data=payload, format="json")
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_create_order_seat_already_bought(self):
+        sample_flight()
+        payload = {
+            "tickets": [
+                {
+                    "row": 1,
+                    "seat": 1,
+                    "flight": 1
+                }
+            ]
+        }
+        res = self.client.post(path=ORDER_URL, data=payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.post(path=ORDER_URL, data=payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("route_exist", res.data["tickets"][0])
+
+    def test_seat_map_follows_tickets(self):
+        flight = sample_flight()
+        payload = {
+            "tickets": [
+                {
+                    "row": 2,
+                    "seat": 3,
+                    "flight": flight.id
+                }
+            ]
+        }
+        res = self.client.post(path=ORDER_URL, data=payload, format="json")
+        flight.refresh_from_db()
+        seat_map = flight.seat_map
+        self.assertTrue(seat_map.is_occupied(2, 3))
+        self.assertEqual(seat_map.available_count(), seat_map.capacity - 1)
+        self.assertEqual(flight.seats_sold, 1)
+
+        Order.objects.get(id=res.data["id"]).delete()
+        flight.refresh_from_db()
+        seat_map = flight.seat_map
+        self.assertFalse(seat_map.is_occupied(2, 3))
+        self.assertEqual(seat_map.available_count(), seat_map.capacity)
+        self.assertEqual(flight.seats_sold, 0)
+
+    def test_create_order_duplicate_places(self):
+        flight = sample_flight()
+        ticket = {"row": 1, "seat": 1, "flight": flight.id}
+        payload = {"tickets": [ticket, ticket]}
+        res = self.client.post(path=ORDER_URL, data=payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_create_order_queries_do_not_grow_with_tickets(self):
+        flight = sample_flight()
+
+        def post_order(row, seats):
+            payload = {
+                "tickets": [
+                    {"row": row, "seat": seat, "flight": flight.id}
+                    for seat in range(1, seats + 1)
+                ]
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(
+                    path=ORDER_URL, data=payload, format="json"
+                )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        self.assertEqual(post_order(1, 1), post_order(2, 8))
+        self.assertEqual(flight.tickets.count(), 9)
+        self.assertEqual(
+            Flight.objects.get(id=flight.id).seat_map.occupied_count(), 9
+        )
@@ -0,0 +1,105 @@
+import random
+import threading
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework.reverse import reverse
+from rest_framework import status
+
+from airport.booking import reconcile_flights
+from airport.models import Flight, Ticket
+from airport.tests.test_flight_api import sample_flight
+
+ORDER_URL = reverse("airport:order-list")
+
+BOOKERS = 16
+ORDERS_PER_BOOKER = 4
+SEATS = [(1, seat) for seat in range(1, 9)] + [(2, 1), (2, 2)]
+
+
+class ConcurrentOrderTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.flight = sample_flight()
+        self.users = [
+            get_user_model().objects.create_user(
+                email=f"booker{number}@test.com",
+                is_staff=True,
+            )
+            for number in range(BOOKERS)
+        ]
+
+    def book(self, user, seed, results):
+        client = APIClient()
+        client.force_authenticate(user)
+        rand = random.Random(seed)
+        try:
+            for _ in range(ORDERS_PER_BOOKER):
+                places = rand.sample(SEATS, 2)
+                payload = {
+                    "tickets": [
+                        {"row": row, "seat": seat, "flight": self.flight.id}
+                        for row, seat in places
+                    ]
+                }
+                res = client.post(ORDER_URL, data=payload, format="json")
+                results.append((res.status_code, places))
+        finally:
+            connection.close()
+
+    def reconcile(self, done):
+        try:
+            while not done.is_set():
+                reconcile_flights(Flight.objects.filter(pk=self.flight.pk))
+        finally:
+            connection.close()
+
+    def test_parallel_bookers_never_oversell(self):
+        results = []
+        threads = [
+            threading.Thread(target=self.book, args=(user, seed, results))
+            for seed, user in enumerate(self.users)
+        ]
+        # A reconciliation running meanwhile must not drop booked seats.
+        done = threading.Event()
+        reconciler = threading.Thread(target=self.reconcile, args=(done,))
+        reconciler.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        done.set()
+        reconciler.join()
+
+        self.assertEqual(len(results), BOOKERS * ORDERS_PER_BOOKER)
+        self.assertTrue(
+            all(
+                code in (status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST)
+                for code, _ in results
+            )
+        )
+
+        sold = list(
+            Ticket.objects.filter(flight=self.flight).values_list(
+                "row", "seat"
+            )
+        )
+        self.assertEqual(len(sold), len(set(sold)))
+        self.assertLessEqual(len(sold), len(SEATS))
+
+        booked = [
+            place
+            for code, places in results
+            if code == status.HTTP_201_CREATED
+            for place in places
+        ]
+        self.assertEqual(sorted(booked), sorted(sold))
+
+        seat_map = Flight.objects.get(id=self.flight.id).seat_map
+        self.assertEqual(seat_map.occupied_count(), len(sold))
+        for row, seat in sold:
+            self.assertTrue(seat_map.is_occupied(row, seat))
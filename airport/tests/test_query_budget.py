@@ -0,0 +1,86 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework.reverse import reverse
+
+from airport.models import Airport, Flight, Order
+from airport.seed import seed_database
+from airport.tests.query_budget import QueryBudgetMixin
+from airport.tests import test_flight_api
+
+CONNECTIONS_PARAMS = {"date": "2024-06-01", "max_stops": 2}
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    budgets = {
+        "airport:crew-list": 1,
+        "airport:airplanetype-list": 1,
+        "airport:order-list": 2,
+        "airport:airplane-list": 1,
+        "airport:airport-list": 1,
+        "airport:route-list": 1,
+        "airport:route-itinerary": 1,
+        "airport:flight-list": 1,
+        # The first legs, then the onward legs of each of the max_stops.
+        "airport:flight-connections": 3,
+        "airport:flight-seats": 1,
+        "airport:api-root": 0,
+        "airport:export": 1,
+        "user:manage": 0,
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test_user@test.com",
+            password="testpassword",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        # Only reachable with two stops, so every onward leg is queried.
+        self.kyiv, self.lviv, self.warsaw, self.berlin = (
+            Airport.objects.create(name=name, closest_big_city=name)
+            for name in ("KBP", "LWO", "WAW", "BER")
+        )
+        flight = test_flight_api.FlightConnectionsApiTests.flight
+        flight(self.kyiv, self.lviv, (8, 0), (9, 0))
+        flight(self.lviv, self.warsaw, (10, 0), (11, 30))
+        flight(self.warsaw, self.berlin, (13, 0), (15, 0))
+
+    def seed(self, count):
+        seed_database(count, seed=count)
+        Order.objects.update(user=self.user)
+
+    def route_arguments(self, name) -> tuple:
+        flight = Flight.objects.select_related("route").order_by("pk")[0]
+        route = flight.route
+        if name == "airport:flight-seats":
+            return {"pk": flight.pk}, {}
+        if name == "airport:flight-connections":
+            return {}, {
+                "source": self.kyiv.id,
+                "destination": self.berlin.id,
+                **CONNECTIONS_PARAMS,
+            }
+        if name == "airport:route-itinerary":
+            return {}, {
+                "source": route.source_id,
+                "destination": route.destination_id,
+            }
+        if name == "airport:export":
+            return {"dataset": "tickets", "export_format": "csv"}, {}
+        return super().route_arguments(name)
+
+    def test_registered_routes_stay_within_budget(self):
+        self.assert_query_budgets()
+
+    def test_connections_budget_covers_onward_legs(self):
+        res = self.client.get(reverse("airport:flight-connections"), {
+            "source": self.kyiv.id,
+            "destination": self.berlin.id,
+            **CONNECTIONS_PARAMS,
+        })
+        self.assertEqual([option["stops"] for option in res.data], [2])
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework.reverse import reverse
+from rest_framework import status
+
+from airport.models import Airport
+from airport.tests.test_airport_api import sample_airport
+
+AIRPORT_URL = reverse("airport:airport-list")
+
+
+class ReferenceDataCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@admin.com",
+            password="testpassword",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_is_served_from_cache(self):
+        sample_airport()
+        first = self.client.get(AIRPORT_URL)
+        with self.assertNumQueries(0):
+            second = self.client.get(AIRPORT_URL)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_conditional_get_not_modified(self):
+        sample_airport()
+        res = self.client.get(AIRPORT_URL)
+        res = self.client.get(AIRPORT_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(res.content)
+
+    def test_write_invalidates_cached_list(self):
+        sample_airport()
+        etag = self.client.get(AIRPORT_URL)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                AIRPORT_URL, {"name": "LWO", "closest_big_city": "Lviv"}
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.get(AIRPORT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Airport.objects.get(name="LWO").delete()
+        res = self.client.get(AIRPORT_URL)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_cached_list_invalidated_on_commit(self):
+        sample_airport()
+        self.client.get(AIRPORT_URL)
+        with self.captureOnCommitCallbacks() as callbacks:
+            sample_airport(name="Lviv International Airport")
+            # Not committed yet, readers keep the cached rows.
+            res = self.client.get(AIRPORT_URL)
+            self.assertEqual(len(res.data["results"]), 1)
+        for callback in callbacks:
+            callback()
+        res = self.client.get(AIRPORT_URL)
+        self.assertEqual(len(res.data["results"]), 2)
@@ -1,14 +1,20 @@
 from typing import Tuple
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 
 from rest_framework.test import APIClient
 from rest_framework.reverse import reverse
 from rest_framework import status
 
+from airport.cache import invalidate
 from airport.models import Route, Airport
 from airport.serializers import RouteSerializer
+from airport.validation import skip_model_clean
 
 ROUTE_URL = reverse("airport:route-list")
 
@@ -38,6 +44,7 @@ def sample_route(**params) -> Route:
 
 class UnauthenticatedRouteApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_auth_required(self):
@@ -47,6 +54,7 @@ class UnauthenticatedRouteApiTests(TestCase):
 
 class AuthenticatedRouteApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="test_user@test.com",
@@ -60,7 +68,7 @@ class AuthenticatedRouteApiTests(TestCase):
         serializer = RouteSerializer(routes, many=True)
         res = self.client.get(ROUTE_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_create_airplane_forbidden(self):
         source = Airport.objects.create(
@@ -82,6 +90,7 @@ class AuthenticatedRouteApiTests(TestCase):
 
 class AdminRouteTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="admin@admin.com",
@@ -142,3 +151,146 @@ class AdminRouteTests(TestCase):
             res.data["non_field_errors"][0].code,
             "invalid"
         )
+
+    def test_create_route_checks_existence_once(self):
+        source, destination = sample_airports()
+        payload = {
+            "source": source.id,
+            "destination": destination.id,
+            "distance": 400,
+        }
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(path=ROUTE_URL, data=payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        existence_checks = [
+            query for query in queries.captured_queries
+            if query["sql"].startswith("SELECT 1 AS")
+            and '"airport_route"."distance"' in query["sql"]
+        ]
+        self.assertEqual(len(existence_checks), 1)
+
+
+class RouteModelValidationTests(TestCase):
+    def test_save_rejects_equal_source_and_destination(self):
+        source, _ = sample_airports()
+        with self.assertRaises(ValidationError):
+            Route.objects.create(
+                source=source, destination=source, distance=400
+            )
+
+    def test_skip_model_clean_for_bulk_imports(self):
+        source, _ = sample_airports()
+        with skip_model_clean():
+            route = Route.objects.create(
+                source=source, destination=source, distance=400
+            )
+        self.assertIsNotNone(route.pk)
+
+
+ITINERARY_URL = reverse("airport:route-itinerary")
+
+
+class ItineraryApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test_user@test.com",
+            password="testpassword"
+        )
+        self.client.force_authenticate(self.user)
+        self.a, self.b, self.c, self.d = [
+            Airport.objects.create(name=name, closest_big_city=name)
+            for name in ("AAA", "BBB", "CCC", "DDD")
+        ]
+        self.ab = Route.objects.create(
+            source=self.a, destination=self.b, distance=100
+        )
+        self.bc = Route.objects.create(
+            source=self.b, destination=self.c, distance=100
+        )
+        self.ac = Route.objects.create(
+            source=self.a, destination=self.c, distance=500
+        )
+        self.cd = Route.objects.create(
+            source=self.c, destination=self.d, distance=50
+        )
+
+    def search(self, source, destination, **params):
+        return self.client.get(
+            ITINERARY_URL,
+            {"source": source.id, "destination": destination.id, **params},
+        )
+
+    def route_ids(self, res):
+        return [route["id"] for route in res.data["routes"]]
+
+    def test_shortest_itinerary(self):
+        res = self.search(self.a, self.d)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.route_ids(res), [self.ab.id, self.bc.id, self.cd.id]
+        )
+        self.assertEqual(res.data["distance"], 250)
+        self.assertEqual(res.data["hops"], 3)
+        self.assertEqual(
+            res.data["routes"][0], RouteSerializer(self.ab).data
+        )
+
+    def test_fewest_hops_itinerary(self):
+        res = self.search(self.a, self.d, optimize="hops")
+        self.assertEqual(self.route_ids(res), [self.ac.id, self.cd.id])
+
+    def test_itinerary_limits(self):
+        res = self.search(self.a, self.d, max_hops=2)
+        self.assertEqual(self.route_ids(res), [self.ac.id, self.cd.id])
+        res = self.search(self.a, self.d, max_hops=2, max_distance=500)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_itinerary_invalid_params(self):
+        res = self.client.get(ITINERARY_URL, {"source": self.a.id})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.search(self.a, self.d, max_hops=100)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.search(self.a, self.d, optimize="time")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_follows_route_changes_without_queries(self):
+        self.search(self.a, self.d)
+        with self.assertNumQueries(0):
+            res = self.search(self.a, self.d)
+        self.assertEqual(res.data["distance"], 250)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ad = Route.objects.create(
+                source=self.a, destination=self.d, distance=200
+            )
+        with self.assertNumQueries(0):
+            res = self.search(self.a, self.d)
+        self.assertEqual(self.route_ids(res), [ad.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ad.delete()
+        with self.assertNumQueries(0):
+            res = self.search(self.a, self.d)
+        self.assertEqual(res.data["distance"], 250)
+
+    def test_index_rebuilt_after_bulk_changes(self):
+        self.search(self.a, self.d)
+        Route.objects.filter(pk=self.bc.pk).delete()
+        Route.objects.filter(pk=self.ac.pk).update(distance=100)
+        invalidate(Route)
+        res = self.search(self.a, self.d)
+        self.assertEqual(self.route_ids(res), [self.ac.id, self.cd.id])
+        self.assertEqual(res.data["distance"], 150)
+
+    def test_index_reloaded_periodically(self):
+        self.search(self.a, self.d)
+        # A change another worker made, whose version bump is not seen.
+        Route.objects.filter(pk=self.bc.pk).delete()
+        with self.assertNumQueries(0):
+            res = self.search(self.a, self.d)
+        self.assertEqual(res.data["distance"], 250)
+        with override_settings(ITINERARY_RELOAD_SECONDS=0):
+            res = self.search(self.a, self.d)
+        self.assertEqual(self.route_ids(res), [self.ac.id, self.cd.id])
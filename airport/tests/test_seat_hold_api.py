@@ -0,0 +1,199 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework.reverse import reverse
+from rest_framework import status
+
+from airport.models import Flight, Order, SeatHold
+from airport.tests.test_flight_api import sample_flight
+
+HOLD_URL = reverse("airport:seat-hold-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+def hold_url(reference):
+    return reverse("airport:seat-hold-detail", args=[reference])
+
+
+def confirm_url(reference):
+    return reverse("airport:seat-hold-confirm", args=[reference])
+
+
+class UnauthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.post(HOLD_URL, {})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class SeatHoldApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@admin.com",
+            password="testpassword",
+            is_staff=True,
+        )
+        self.other = get_user_model().objects.create_user(
+            email="other@admin.com",
+            password="testpassword",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def hold(self, *seats, user=None, **payload):
+        if user is not None:
+            self.client.force_authenticate(user)
+        res = self.client.post(
+            HOLD_URL,
+            {
+                "flight": self.flight.id,
+                "seats": [{"row": row, "seat": seat} for row, seat in seats],
+                **payload,
+            },
+            format="json",
+        )
+        self.client.force_authenticate(self.user)
+        return res
+
+    def test_hold_seats(self):
+        before = timezone.now()
+        res = self.hold((1, 1), (1, 2), minutes=5)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["flight"], self.flight.id)
+        self.assertEqual(
+            res.data["seats"],
+            [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}],
+        )
+        holds = SeatHold.objects.filter(reference=res.data["reference"])
+        self.assertEqual(holds.count(), 2)
+        self.assertGreaterEqual(
+            holds[0].expires_at, before + timedelta(minutes=5)
+        )
+
+    def test_hold_seats_held_by_someone_else(self):
+        self.hold((1, 1), user=self.other)
+        res = self.hold((1, 2), (1, 1))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.filter(user=self.user).exists())
+
+    def test_expired_hold_is_replaced(self):
+        self.hold((1, 1), user=self.other)
+        SeatHold.objects.update(expires_at=timezone.now())
+        res = self.hold((1, 1))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.user)
+
+    def test_new_hold_keeps_own_holds_on_other_places(self):
+        first = self.hold((1, 2), (2, 1)).data["reference"]
+        res = self.hold((1, 1), (2, 2))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            SeatHold.objects.filter(reference=first).count(), 2
+        )
+        self.assertEqual(SeatHold.objects.count(), 4)
+
+    def test_hold_invalid_seats(self):
+        res = self.hold((1, 1), (1, 1))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.hold((99, 1))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.hold((1, 1), minutes=0)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.hold()
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_confirm_hold(self):
+        reference = self.hold((2, 1), (2, 2)).data["reference"]
+        res = self.client.post(confirm_url(reference))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(pk=res.data["id"])
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(
+            sorted(order.tickets.values_list("row", "seat")),
+            [(2, 1), (2, 2)],
+        )
+        self.assertFalse(SeatHold.objects.exists())
+        flight = Flight.objects.get(pk=self.flight.pk)
+        self.assertEqual(flight.seats_sold, 2)
+        self.assertTrue(flight.seat_map.is_occupied(2, 2))
+
+        res = self.client.post(confirm_url(reference))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_confirm_expired_or_foreign_hold(self):
+        reference = self.hold((1, 1), user=self.other).data["reference"]
+        res = self.client.post(confirm_url(reference))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        reference = self.hold((1, 2)).data["reference"]
+        SeatHold.objects.update(expires_at=timezone.now())
+        res = self.client.post(confirm_url(reference))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Order.objects.exists())
+
+    def test_release_hold(self):
+        reference = self.hold((1, 1)).data["reference"]
+        res = self.client.delete(hold_url(reference))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(SeatHold.objects.exists())
+        res = self.client.delete(hold_url(reference))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_order_rejects_seats_held_by_someone_else(self):
+        self.hold((1, 1), user=self.other)
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("seat_held", res.data["tickets"][0])
+
+    def test_order_takes_own_held_seats(self):
+        self.hold((1, 1))
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(SeatHold.objects.exists())
+
+
+class ReapSeatHoldsCommandTests(TestCase):
+    def test_reap_seat_holds(self):
+        user = get_user_model().objects.create_user(
+            email="test_user@test.com",
+            password="testpassword",
+        )
+        flight = sample_flight()
+        now = timezone.now()
+        SeatHold.objects.bulk_create([
+            SeatHold(
+                flight=flight,
+                row=1,
+                seat=seat,
+                user=user,
+                expires_at=now + timedelta(minutes=seat - 3),
+            )
+            for seat in range(1, 6)
+        ])
+        out = StringIO()
+        call_command("reap_seat_holds", "--batch-size", "1", stdout=out)
+        self.assertIn("Deleted 3 expired hold(s).", out.getvalue())
+        self.assertEqual(
+            sorted(SeatHold.objects.values_list("seat", flat=True)), [4, 5]
+        )
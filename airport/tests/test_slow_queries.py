@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework.reverse import reverse
+from rest_framework import status
+
+from airport.tests.test_flight_api import sample_flight
+
+ORDER_URL = reverse("airport:order-list")
+
+
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test_user@test.com",
+            password="testpassword",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def create_order(self):
+        return self.client.post(
+            ORDER_URL,
+            {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 1}]},
+            format="json",
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_SAMPLE_RATE=1.0)
+    def test_slow_queries_logged_with_view_and_stack(self):
+        with self.assertLogs("airport.slow_queries", "WARNING") as logs:
+            res = self.create_order()
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        records = [
+            record for record in logs.records
+            if "INSERT" in record.sql and "airport_ticket" in record.sql
+        ]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].view, "airport:order-list")
+        self.assertTrue(
+            any("airport/booking.py" in frame for frame in records[0].stack)
+        )
+        self.assertTrue(
+            all("site-packages" not in frame for frame in records[0].stack)
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_SAMPLE_RATE=0.0)
+    def test_unsampled_queries_not_logged(self):
+        with self.assertNoLogs("airport.slow_queries", "WARNING"):
+            res = self.create_order()
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_fast_queries_not_logged(self):
+        with self.assertNoLogs("airport.slow_queries", "WARNING"):
+            res = self.create_order()
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,89 @@
+import json
+from io import StringIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase
+
+from airport.models import Flight, Order, Route, Ticket
+from airport.snapshot import iter_json_array, load_snapshot
+
+FIXTURE = settings.BASE_DIR / "db.json"
+
+
+class SnapshotTests(TestCase):
+    def load_fixture(self, **kwargs):
+        with open(FIXTURE, encoding="utf-8") as stream:
+            return load_snapshot(stream, **kwargs)
+
+    def test_iter_json_array_reads_in_small_chunks(self):
+        with open(FIXTURE, encoding="utf-8") as stream:
+            expected = json.load(stream)
+        with open(FIXTURE, encoding="utf-8") as stream:
+            items = list(iter_json_array(stream, read_size=7))
+        self.assertEqual(items, expected)
+
+    def test_iter_json_array_rejects_truncated_input(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array(StringIO('[{"model": "airport.crew"}, {')))
+
+    def test_load_fixture_in_batches(self):
+        loaded = self.load_fixture(batch_size=2)
+        self.assertEqual(loaded[Ticket], 9)
+        self.assertEqual(Ticket.objects.count(), 9)
+        self.assertEqual(Route.objects.count(), 7)
+        for flight in Flight.objects.all():
+            self.assertEqual(flight.seats_sold, flight.tickets.count())
+            self.assertEqual(
+                flight.seat_map.occupied_count(), flight.seats_sold
+            )
+
+    def test_load_fixture_with_validation_twice(self):
+        self.load_fixture(validate=True)
+        self.load_fixture(validate=True)
+        self.assertEqual(Ticket.objects.count(), 9)
+
+    def test_validation_rejects_invalid_rows(self):
+        with open(FIXTURE, encoding="utf-8") as stream:
+            items = json.load(stream)
+        snapshot = StringIO(json.dumps([
+            item for item in items if item["model"] != "airport.ticket"
+        ] + [{
+            "model": "airport.ticket",
+            "pk": 1,
+            "fields": {"row": 1000, "seat": 1, "flight": 5, "order": 1},
+        }]))
+        with self.assertRaises(ValidationError):
+            load_snapshot(snapshot, validate=True)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_dump_and_load_round_trip(self):
+        self.load_fixture()
+        out = StringIO()
+        call_command("snapshot", "dump", "-", "--batch-size", "3", stdout=out)
+        dumped = json.loads(out.getvalue())
+        self.assertEqual(len(dumped), 52)
+
+        Ticket.objects.all().delete()
+        Flight.objects.all().delete()
+        load_snapshot(StringIO(out.getvalue()))
+        self.assertEqual(Ticket.objects.count(), 9)
+        self.assertEqual(Flight.objects.count(), 4)
+
+    def test_round_trip_keeps_created_at(self):
+        self.load_fixture()
+        created = dict(Order.objects.values_list("pk", "created_at"))
+        self.assertEqual(
+            created[1].isoformat(), "2024-11-29T11:33:41.079000+00:00"
+        )
+        out = StringIO()
+        call_command("snapshot", "dump", "-", stdout=out)
+
+        # Existing rows are overwritten, missing ones inserted.
+        Order.objects.filter(pk=1).delete()
+        load_snapshot(StringIO(out.getvalue()))
+        self.assertEqual(
+            dict(Order.objects.values_list("pk", "created_at")), created
+        )
+        self.assertTrue(Order._meta.get_field("created_at").auto_now_add)
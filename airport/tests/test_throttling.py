@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status, throttling
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+
+from airport_service.throttling import UserRateThrottle
+
+RATES = {
+    "anon": "10/min",
+    "user": "3/min",
+    "orders": "2/min",
+    "flights": "5/min",
+}
+
+
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = APIRequestFactory().get("/")
+        self.request.user = get_user_model().objects.create_user(
+            email="test_user@test.com",
+            password="testpassword",
+        )
+        self.now = 600.0
+
+    def allow(self) -> UserRateThrottle:
+        with mock.patch.object(
+            throttling.SimpleRateThrottle, "THROTTLE_RATES", RATES
+        ):
+            throttle = UserRateThrottle()
+        throttle.timer = lambda: self.now
+        throttle.allowed = throttle.allow_request(self.request, None)
+        return throttle
+
+    def test_limit_within_a_window(self):
+        self.assertTrue(all(self.allow().allowed for _ in range(3)))
+        throttle = self.allow()
+        self.assertFalse(throttle.allowed)
+        self.assertEqual(throttle.wait(), 80)
+        # The state is a single counter per window.
+        self.assertEqual(cache.get(f"{throttle.key}:10"), 3)
+
+    def test_previous_window_is_weighted(self):
+        for _ in range(3):
+            self.allow()
+        self.now += 90
+        self.assertTrue(self.allow().allowed)
+        throttle = self.allow()
+        self.assertFalse(throttle.allowed)
+        self.assertEqual(throttle.wait(), 10)
+        self.assertEqual(cache.get(f"{throttle.key}:11"), 1)
+
+        self.now += 10
+        self.assertTrue(self.allow().allowed)
+        self.assertFalse(self.allow().allowed)
+
+
+@mock.patch.object(throttling.SimpleRateThrottle, "THROTTLE_RATES", RATES)
+class ScopedThrottleApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test_user@test.com",
+            password="testpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_orders_scope_is_stricter(self):
+        url = reverse("airport:order-list")
+        for _ in range(2):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+    def test_flights_scope_is_looser(self):
+        url = reverse("airport:flight-list")
+        for _ in range(5):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -1,25 +1,62 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework import routers
 
+from airport import async_views
 from airport.views import (
     CrewViewSet,
     AirplaneTypeViewSet,
     OrderViewSet,
+    SeatHoldViewSet,
     AirplaneViewSet,
     AirportViewSet,
     RouteViewSet,
     FlightViewSet,
+    ExportView,
 )
 
 router = routers.DefaultRouter()
 router.register("crews", CrewViewSet)
 router.register("airplane_types", AirplaneTypeViewSet)
 router.register("orders", OrderViewSet)
+router.register("holds", SeatHoldViewSet, basename="seat-hold")
 router.register("airplanes", AirplaneViewSet)
 router.register("airports", AirportViewSet)
 router.register("routes", RouteViewSet)
 router.register("flights", FlightViewSet)
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    re_path(
+        r"^exports/(?P<dataset>orders|tickets)"
+        r"\.(?P<export_format>csv|ndjson)$",
+        ExportView.as_view(),
+        name="export",
+    ),
+    path(
+        "async/flights/",
+        async_views.flight_list,
+        name="async-flight-list",
+    ),
+    path(
+        "async/flights/<int:pk>/",
+        async_views.flight_detail,
+        name="async-flight-detail",
+    ),
+    path(
+        "async/flights/<int:pk>/seats/",
+        async_views.flight_seats,
+        name="async-flight-seats",
+    ),
+    path(
+        "async/airports/",
+        async_views.airport_list,
+        name="async-airport-list",
+    ),
+    path(
+        "async/routes/",
+        async_views.route_list,
+        name="async-route-list",
+    ),
+]
 
 app_name = "airport"
@@ -0,0 +1,85 @@
+import contextvars
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+class ValidationScope:
+    """Validation state shared by every write of one request or import.
+
+    ``clean`` tells models whether save() still has to run clean(), and
+    ``lookups`` memoizes the database reads the validators depend on.
+    """
+
+    def __init__(self, clean: bool = True, lookups: dict = None) -> None:
+        self.clean = clean
+        self.lookups = {} if lookups is None else lookups
+
+
+_scope = contextvars.ContextVar("airport_validation_scope", default=None)
+
+
+@contextmanager
+def validation_scope(clean: bool = True):
+    parent = _scope.get()
+    scope = ValidationScope(
+        clean=clean,
+        lookups=parent.lookups if parent is not None else None,
+    )
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+def skip_model_clean():
+    """Save models without running clean() again.
+
+    Used by serializers, which have validated the data already, and by
+    bulk imports that trust their input.
+    """
+    return validation_scope(clean=False)
+
+
+def should_clean() -> bool:
+    scope = _scope.get()
+    return scope is None or scope.clean
+
+
+def lookup(key, loader):
+    """Return loader() memoized for the current scope."""
+    scope = _scope.get()
+    if scope is None:
+        return loader()
+    if key not in scope.lookups:
+        scope.lookups[key] = loader()
+    return scope.lookups[key]
+
+
+def remember(key, value) -> None:
+    scope = _scope.get()
+    if scope is not None:
+        scope.lookups[key] = value
+
+
+class ValidationScopeMiddleware:
+    """Open one validation scope per request."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with validation_scope():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with validation_scope():
+            return await self.get_response(request)
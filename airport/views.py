@@ -1,7 +1,29 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import F, Prefetch
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
+from airport.booking import confirm_hold, release_hold
+from airport.cache import CachedListMixin, not_modified, seat_map_etag
+from airport.connections import MAX_STOPS, find_connections
+from airport.exports import export_lines
+from airport.itinerary import MAX_HOPS, current_graph
+from airport.pagination import (
+    FlightCursorPagination,
+    OrderCursorPagination,
+)
 from airport.models import (
     Crew,
     AirplaneType,
@@ -20,11 +42,33 @@ from airport.serializers import (
     AirplaneSerializer,
     RouteSerializer,
     FlightSerializer,
+    FlightListSerializer,
+    FlightSeatMapSerializer,
+    SeatHoldSerializer,
     TicketSerializer,
 )
+from airport_service.throttling import AnonRateThrottle, ScopedRateThrottle
+
+
+def _param_to_int(name, value, minimum=0, maximum=None):
+    """Converts a query param to an integer within the bounds"""
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({name: "Expected an integer."})
+    if number < minimum:
+        raise ValidationError(
+            {name: f"Expected a value of at least {minimum}."}
+        )
+    if maximum is not None and number > maximum:
+        raise ValidationError(
+            {name: f"Expected a value of at most {maximum}."}
+        )
+    return number
 
 
 class CrewViewSet(
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -42,6 +86,7 @@ class CrewViewSet(
 
 
 class AirplaneTypeViewSet(
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -63,12 +108,20 @@ class OrderViewSet(
     mixins.ListModelMixin,
     GenericViewSet,
 ):
-    queryset = (
-        Order.objects.all().
-        select_related("user").
-        prefetch_related("tickets__flight")
-    )
+    queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    pagination_class = OrderCursorPagination
+    throttle_scope = "orders"
+
+    def get_queryset(self):
+        tickets = Ticket.objects.select_related(
+            "flight__route__source",
+            "flight__route__destination",
+            "flight__airplane",
+        )
+        return self.queryset.filter(user=self.request.user).prefetch_related(
+            Prefetch("tickets", queryset=tickets)
+        )
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -82,7 +135,34 @@ class OrderViewSet(
         return super().create(request, *args, **kwargs)
 
 
+class SeatHoldViewSet(mixins.CreateModelMixin, GenericViewSet):
+    serializer_class = SeatHoldSerializer
+    lookup_field = "reference"
+    lookup_value_regex = "[0-9a-f-]{36}"
+
+    def create(self, request, *args, **kwargs):
+        """Hold seats of a flight for a few minutes"""
+        return super().create(request, *args, **kwargs)
+
+    def destroy(self, request, reference=None):
+        """Release the seats of a hold"""
+        if not release_hold(request.user, reference):
+            raise NotFound("The hold does not exist or has expired.")
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @extend_schema(request=None, responses=OrderSerializer)
+    @action(methods=["POST"], detail=True, url_path="confirm")
+    def confirm(self, request, reference=None):
+        """Turn the held seats into an order"""
+        order = confirm_hold(request.user, reference)
+        order = Order.objects.prefetch_related("tickets").get(pk=order.pk)
+        return Response(
+            OrderSerializer(order).data, status=status.HTTP_201_CREATED
+        )
+
+
 class AirplaneViewSet(
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -100,6 +180,7 @@ class AirplaneViewSet(
 
 
 class AirportViewSet(
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -117,6 +198,7 @@ class AirportViewSet(
 
 
 class RouteViewSet(
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -132,15 +214,250 @@ class RouteViewSet(
         """Create a new route"""
         return super().create(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Id of the departure airport (ex. ?source=1)",
+            ),
+            OpenApiParameter(
+                "destination",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Id of the arrival airport (ex. ?destination=4)",
+            ),
+            OpenApiParameter(
+                "max_hops",
+                type=OpenApiTypes.INT,
+                description=(
+                    f"Maximum number of routes, from 1 to {MAX_HOPS} "
+                    f"(ex. ?max_hops=2), 3 by default"
+                ),
+            ),
+            OpenApiParameter(
+                "max_distance",
+                type=OpenApiTypes.INT,
+                description=(
+                    "Maximum total distance in km (ex. ?max_distance=5000)"
+                ),
+            ),
+            OpenApiParameter(
+                "optimize",
+                type=OpenApiTypes.STR,
+                enum=["distance", "hops"],
+                description=(
+                    "Find the shortest itinerary or the one with the "
+                    "fewest routes, distance by default"
+                ),
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="itinerary")
+    def itinerary(self, request):
+        """Find the best sequence of routes between two airports"""
+        params = request.query_params
+        source = _param_to_int("source", params.get("source"))
+        destination = _param_to_int(
+            "destination", params.get("destination")
+        )
+        max_hops = _param_to_int(
+            "max_hops", params.get("max_hops", 3), 1, MAX_HOPS
+        )
+        max_distance = None
+        if params.get("max_distance"):
+            max_distance = _param_to_int(
+                "max_distance", params["max_distance"]
+            )
+        optimize = params.get("optimize", "distance")
+        if optimize not in ("distance", "hops"):
+            raise ValidationError(
+                {"optimize": "Expected distance or hops."}
+            )
+
+        path = current_graph().search(
+            source, destination, max_hops, max_distance, optimize
+        )
+        if path is None:
+            raise NotFound("No itinerary found.")
+        routes = [
+            {
+                "id": route_id,
+                "source": route_source,
+                "destination": route_destination,
+                "distance": distance,
+            }
+            for route_id, route_source, route_destination, distance in path
+        ]
+        return Response({
+            "source": source,
+            "destination": destination,
+            "hops": len(routes),
+            "distance": sum(route["distance"] for route in routes),
+            "routes": routes,
+        })
+
 
 class FlightViewSet(
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
 ):
-    queryset = Flight.objects.all()
+    queryset = Flight.objects.select_related(
+        "route__source",
+        "route__destination",
+        "airplane__airplane_type",
+    )
     serializer_class = FlightSerializer
+    pagination_class = FlightCursorPagination
+    # Browsing flights is limited by the looser "flights" rate only.
+    throttle_classes = (AnonRateThrottle, ScopedRateThrottle)
+    throttle_scope = "flights"
+
+    @staticmethod
+    def _params_to_ints(name, value):
+        """Converts a list of string IDs to a list of integers"""
+        try:
+            return [int(str_id) for str_id in value.split(",")]
+        except ValueError:
+            raise ValidationError({name: "Expected comma separated ids."})
 
+    @staticmethod
+    def _param_to_datetime(name, value):
+        """Converts a date string to the aware start of that day"""
+        date = parse_date(value) if value else None
+        if date is None:
+            raise ValidationError({name: "Expected a date in YYYY-MM-DD."})
+        return timezone.make_aware(datetime.combine(date, time.min))
+
+    def get_queryset(self):
+        if self.action == "seats":
+            return Flight.objects.select_related("airplane").only(
+                "occupied_seats",
+                "airplane__rows",
+                "airplane__seats_in_row",
+            )
+
+        queryset = self.filter_by_params(
+            self.queryset, self.request.query_params
+        )
+        if self.action == "list":
+            capacity = F("airplane__rows") * F("airplane__seats_in_row")
+            queryset = queryset.annotate(
+                capacity=capacity,
+                tickets_available=capacity - F("seats_sold"),
+            )
+        return queryset
+
+    @classmethod
+    def filter_by_params(cls, queryset, params):
+        """Apply the flight list filters given in the query params"""
+        if params.get("source"):
+            queryset = queryset.filter(
+                route__source_id__in=cls._params_to_ints(
+                    "source", params["source"]
+                )
+            )
+        if params.get("destination"):
+            queryset = queryset.filter(
+                route__destination_id__in=cls._params_to_ints(
+                    "destination", params["destination"]
+                )
+            )
+        if params.get("from_city"):
+            queryset = queryset.filter(
+                route__source__closest_big_city__iexact=params["from_city"]
+            )
+        if params.get("to_city"):
+            queryset = queryset.filter(
+                route__destination__closest_big_city__iexact=(
+                    params["to_city"]
+                )
+            )
+        if params.get("departure_from"):
+            queryset = queryset.filter(
+                departure_time__gte=cls._param_to_datetime(
+                    "departure_from", params["departure_from"]
+                )
+            )
+        if params.get("departure_to"):
+            queryset = queryset.filter(
+                departure_time__lt=cls._param_to_datetime(
+                    "departure_to", params["departure_to"]
+                ) + timedelta(days=1)
+            )
+        if params.get("airplane_type"):
+            queryset = queryset.filter(
+                airplane__airplane_type_id__in=cls._params_to_ints(
+                    "airplane_type", params["airplane_type"]
+                )
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return FlightListSerializer
+        if self.action == "seats":
+            return FlightSeatMapSerializer
+        return FlightSerializer
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source",
+                type={"type": "list", "items": {"type": "number"}},
+                description="Filter by source airport ids (ex. ?source=1,2)",
+            ),
+            OpenApiParameter(
+                "destination",
+                type={"type": "list", "items": {"type": "number"}},
+                description=(
+                    "Filter by destination airport ids "
+                    "(ex. ?destination=3,4)"
+                ),
+            ),
+            OpenApiParameter(
+                "from_city",
+                type=OpenApiTypes.STR,
+                description=(
+                    "Filter by closest big city of the source airport "
+                    "(ex. ?from_city=Kyiv)"
+                ),
+            ),
+            OpenApiParameter(
+                "to_city",
+                type=OpenApiTypes.STR,
+                description=(
+                    "Filter by closest big city of the destination airport "
+                    "(ex. ?to_city=Lviv)"
+                ),
+            ),
+            OpenApiParameter(
+                "departure_from",
+                type=OpenApiTypes.DATE,
+                description=(
+                    "Flights departing on or after the date "
+                    "(ex. ?departure_from=2024-06-01)"
+                ),
+            ),
+            OpenApiParameter(
+                "departure_to",
+                type=OpenApiTypes.DATE,
+                description=(
+                    "Flights departing on or before the date "
+                    "(ex. ?departure_to=2024-06-30)"
+                ),
+            ),
+            OpenApiParameter(
+                "airplane_type",
+                type={"type": "list", "items": {"type": "number"}},
+                description=(
+                    "Filter by airplane type ids (ex. ?airplane_type=1,2)"
+                ),
+            ),
+        ]
+    )
     def list(self, request, *args, **kwargs):
         """Retrieve list of flights"""
         return super().list(request, *args, **kwargs)
@@ -148,3 +465,185 @@ class FlightViewSet(
     def create(self, request, *args, **kwargs):
         """Create a new flight"""
         return super().create(request, *args, **kwargs)
+
+    @action(methods=["GET"], detail=True, url_path="seats")
+    def seats(self, request, pk=None):
+        """Retrieve the occupied seats of a flight as a bitmap"""
+        flight = self.get_object()
+        airplane = flight.airplane
+        etag = seat_map_etag(
+            airplane.rows, airplane.seats_in_row, bytes(flight.seat_map)
+        )
+        if not_modified(request, etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        serializer = self.get_serializer(flight)
+        return Response(serializer.data, headers={"ETag": etag})
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Id of the departure airport (ex. ?source=1)",
+            ),
+            OpenApiParameter(
+                "destination",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Id of the arrival airport (ex. ?destination=4)",
+            ),
+            OpenApiParameter(
+                "date",
+                type=OpenApiTypes.DATE,
+                required=True,
+                description=(
+                    "Departure date of the first flight "
+                    "(ex. ?date=2024-06-01)"
+                ),
+            ),
+            OpenApiParameter(
+                "max_stops",
+                type=OpenApiTypes.INT,
+                description=(
+                    f"Maximum number of stops, from 0 to {MAX_STOPS} "
+                    f"(ex. ?max_stops=2), 1 by default"
+                ),
+            ),
+            OpenApiParameter(
+                "min_layover",
+                type=OpenApiTypes.INT,
+                description=(
+                    "Minimum minutes between connecting flights "
+                    "(ex. ?min_layover=60), 45 by default"
+                ),
+            ),
+            OpenApiParameter(
+                "max_layover",
+                type=OpenApiTypes.INT,
+                description=(
+                    "Maximum minutes between connecting flights "
+                    "(ex. ?max_layover=240), 360 by default"
+                ),
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description=(
+                    "Maximum number of options, from 1 to 100 "
+                    "(ex. ?limit=5), 20 by default"
+                ),
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="connections")
+    def connections(self, request):
+        """Find direct and connecting flights between two airports"""
+        params = request.query_params
+        source = _param_to_int("source", params.get("source"))
+        destination = _param_to_int(
+            "destination", params.get("destination")
+        )
+        if source == destination:
+            raise ValidationError(
+                {"destination": "Expected another airport than source."}
+            )
+        departure_from = self._param_to_datetime("date", params.get("date"))
+        max_stops = _param_to_int(
+            "max_stops", params.get("max_stops", 1), 0, MAX_STOPS
+        )
+        min_layover = _param_to_int(
+            "min_layover", params.get("min_layover", 45)
+        )
+        max_layover = _param_to_int(
+            "max_layover", params.get("max_layover", 360), min_layover
+        )
+        limit = _param_to_int("limit", params.get("limit", 20), 1, 100)
+
+        itineraries = find_connections(
+            source,
+            destination,
+            departure_from,
+            departure_from + timedelta(days=1),
+            min_layover=timedelta(minutes=min_layover),
+            max_layover=timedelta(minutes=max_layover),
+            max_stops=max_stops,
+            limit=limit,
+        )
+        return Response([
+            {
+                "stops": len(flights) - 1,
+                "departure_time": flights[0]["departure_time"],
+                "arrival_time": flights[-1]["arrival_time"],
+                "duration": int((
+                    flights[-1]["arrival_time"] - flights[0]["departure_time"]
+                ).total_seconds() // 60),
+                "flights": flights,
+            }
+            for flights in itineraries
+        ])
+
+
+class ExportView(APIView):
+    """Stream every order or ticket as csv or ndjson, for staff only."""
+
+    permission_classes = (IsAdminUser,)
+    # Token claims may predate a demotion made through another worker.
+    fresh_user = True
+    content_types = {
+        "csv": "text/csv; charset=utf-8",
+        "ndjson": "application/x-ndjson",
+    }
+
+    def perform_content_negotiation(self, request, force=False):
+        # The response is rendered by export_lines, not by a renderer,
+        # so an Accept header like text/csv must not end in a 406.
+        return super().perform_content_negotiation(request, force=True)
+
+    @staticmethod
+    def _param_to_date(name, value):
+        date = parse_date(value) if value else None
+        if date is None:
+            raise ValidationError({name: "Expected a date in YYYY-MM-DD."})
+        return date
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "created_from",
+                type=OpenApiTypes.DATE,
+                description=(
+                    "Orders created on or after the date "
+                    "(ex. ?created_from=2024-06-01)"
+                ),
+            ),
+            OpenApiParameter(
+                "created_to",
+                type=OpenApiTypes.DATE,
+                description=(
+                    "Orders created on or before the date "
+                    "(ex. ?created_to=2024-06-30)"
+                ),
+            ),
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    def get(self, request, dataset, export_format):
+        """Export orders or tickets"""
+        filters = {}
+        for name in ("created_from", "created_to"):
+            if request.query_params.get(name):
+                filters[name] = self._param_to_date(
+                    name, request.query_params[name]
+                )
+
+        response = StreamingHttpResponse(
+            export_lines(dataset, export_format, **filters),
+            content_type=self.content_types[export_format],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{dataset}.{export_format}"'
+        )
+        return response
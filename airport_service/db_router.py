@@ -0,0 +1,184 @@
+"""
+Read replica routing with read-your-writes pinning.
+
+Reads of safe-method requests go to a healthy alias of DATABASE_REPLICAS.
+Everything else uses the primary ("default"): writes, reads of unsafe
+requests or inside a transaction, reads outside of requests (commands,
+shells) and reads of users who wrote in the last REPLICA_PIN_SECONDS.
+Pins are kept in the REPLICA_PIN_CACHE_ALIAS cache, which must be shared
+by all workers for a user's next request to see them.
+A replica is healthy when it answers and lags at most
+REPLICA_MAX_LAG_SECONDS behind, checked every
+REPLICA_HEALTH_CHECK_INTERVAL seconds per process.
+"""
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.functional import LazyObject
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+POSTGRES_LAG_SQL = (
+    "SELECT CASE WHEN pg_is_in_recovery() THEN COALESCE(EXTRACT(EPOCH "
+    "FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END"
+)
+
+
+class RoutingState:
+    def __init__(self, request, primary: bool) -> None:
+        self.request = request
+        self.primary = primary
+        self.user_id = None
+
+
+_state = contextvars.ContextVar("airport_db_routing", default=None)
+
+
+@contextmanager
+def request_routing(request):
+    """Route the reads made while handling ``request``."""
+    token = _state.set(
+        RoutingState(request, primary=request.method not in SAFE_METHODS)
+    )
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def get_pin_cache():
+    return caches[getattr(settings, "REPLICA_PIN_CACHE_ALIAS", "default")]
+
+
+def _pin_key(user_id) -> str:
+    return f"airport:db:pin:{user_id}"
+
+
+def pin_user(user) -> None:
+    """Send the user's reads to the primary for REPLICA_PIN_SECONDS."""
+    if user is not None and user.is_authenticated:
+        get_pin_cache().set(
+            _pin_key(user.pk),
+            True,
+            getattr(settings, "REPLICA_PIN_SECONDS", 5),
+        )
+
+
+def is_pinned(user_id) -> bool:
+    return get_pin_cache().get(_pin_key(user_id), False)
+
+
+def _request_user(request):
+    # DRF stores the authenticated user on the Django request. The lazy
+    # session user set by AuthenticationMiddleware is not evaluated here,
+    # loading it would itself need a read.
+    user = request.__dict__.get("user")
+    if user is None or isinstance(user, LazyObject):
+        return None
+    return user if user.is_authenticated else None
+
+
+def use_primary() -> bool:
+    state = _state.get()
+    if state is None or state.primary:
+        return True
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return True
+    user = _request_user(state.request)
+    if user is not None and state.user_id != user.pk:
+        state.user_id = user.pk
+        state.primary = is_pinned(user.pk)
+    return state.primary
+
+
+def replica_lag(alias) -> float:
+    """Return the replication lag of an alias in seconds."""
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(POSTGRES_LAG_SQL)
+        else:
+            cursor.execute("SELECT 0")
+        return float(cursor.fetchone()[0])
+
+
+_health = {}
+_health_lock = threading.Lock()
+
+
+def replica_is_healthy(alias) -> bool:
+    interval = getattr(settings, "REPLICA_HEALTH_CHECK_INTERVAL", 5)
+    now = time.monotonic()
+    with _health_lock:
+        checked = _health.get(alias)
+        if checked is not None and now - checked[0] < interval:
+            return checked[1]
+        # Other threads keep the previous result while this one checks.
+        _health[alias] = (now, checked[1] if checked else True)
+    try:
+        healthy = replica_lag(alias) <= getattr(
+            settings, "REPLICA_MAX_LAG_SECONDS", 5
+        )
+    except DatabaseError:
+        healthy = False
+    with _health_lock:
+        _health[alias] = (now, healthy)
+    return healthy
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if not replicas or use_primary():
+            return DEFAULT_DB_ALIAS
+        healthy = [alias for alias in replicas if replica_is_healthy(alias)]
+        return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, "DATABASE_REPLICAS", []):
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Route each request's reads and pin users after their writes."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_routing(request):
+            response = self.get_response(request)
+        self.pin_writer(request, response)
+        return response
+
+    async def __acall__(self, request):
+        with request_routing(request):
+            response = await self.get_response(request)
+        self.pin_writer(request, response)
+        return response
+
+    @staticmethod
+    def pin_writer(request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_user(_request_user(request))
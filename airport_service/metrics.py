@@ -0,0 +1,238 @@
+"""
+Lightweight in-process request metrics exposed in the Prometheus text
+format.
+
+MetricsMiddleware samples requests (METRICS_SAMPLE_RATE) and records their
+latency, database queries and response size per resolved view name.
+Metrics are kept per worker process; scrape every worker or run a single
+process per container. Database queries are only counted for requests
+served synchronously, under ASGI they run in other threads.
+"""
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.query_duration = 0.0
+        self.response_bytes = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.views = defaultdict(ViewMetrics)
+            self.responses = defaultdict(int)
+            self.cache = {"hit": 0, "miss": 0}
+
+    def record_request(
+            self,
+            view,
+            method,
+            status_code,
+            duration,
+            queries,
+            query_duration,
+            response_bytes,
+    ):
+        bucket = bisect_left(LATENCY_BUCKETS, duration)
+        with self.lock:
+            metrics = self.views[view]
+            if bucket < len(LATENCY_BUCKETS):
+                metrics.buckets[bucket] += 1
+            metrics.count += 1
+            metrics.duration += duration
+            metrics.queries += queries
+            metrics.query_duration += query_duration
+            metrics.response_bytes += response_bytes
+            self.responses[(view, method, status_code)] += 1
+
+    def record_cache(self, hit: bool):
+        with self.lock:
+            self.cache["hit" if hit else "miss"] += 1
+
+    def render(self) -> str:
+        with self.lock:
+            views = sorted(self.views.items())
+            responses = sorted(self.responses.items())
+            cache = dict(self.cache)
+
+        lines = [
+            "# HELP airport_request_duration_seconds Request latency.",
+            "# TYPE airport_request_duration_seconds histogram",
+        ]
+        for view, metrics in views:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, metrics.buckets):
+                cumulative += count
+                lines.append(
+                    f"airport_request_duration_seconds_bucket"
+                    f'{{view="{view}",le="{bound}"}} {cumulative}'
+                )
+            lines += [
+                f"airport_request_duration_seconds_bucket"
+                f'{{view="{view}",le="+Inf"}} {metrics.count}',
+                f"airport_request_duration_seconds_sum"
+                f'{{view="{view}"}} {metrics.duration}',
+                f"airport_request_duration_seconds_count"
+                f'{{view="{view}"}} {metrics.count}',
+            ]
+
+        counters = (
+            ("airport_db_queries_total", "Database queries.", "queries"),
+            (
+                "airport_db_query_seconds_total",
+                "Time spent in database queries.",
+                "query_duration",
+            ),
+            (
+                "airport_response_bytes_total",
+                "Size of response bodies.",
+                "response_bytes",
+            ),
+        )
+        for name, description, attribute in counters:
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+            lines += [
+                f'{name}{{view="{view}"}} {getattr(metrics, attribute)}'
+                for view, metrics in views
+            ]
+
+        lines += [
+            "# HELP airport_responses_total Responses by status code.",
+            "# TYPE airport_responses_total counter",
+        ]
+        lines += [
+            f'airport_responses_total{{view="{view}",method="{method}",'
+            f'status="{status_code}"}} {count}'
+            for (view, method, status_code), count in responses
+        ]
+
+        lines += [
+            "# HELP airport_cache_requests_total Response cache lookups.",
+            "# TYPE airport_cache_requests_total counter",
+        ]
+        lines += [
+            f'airport_cache_requests_total{{result="{result}"}} {count}'
+            for result, count in sorted(cache.items())
+        ]
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class QueryCounter:
+    """connection.execute_wrapper that counts queries and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+@contextmanager
+def wrap_connections(wrapper):
+    """Install an execute-wrapper on the connections of every alias, so
+    queries routed to replicas are seen as well."""
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(wrapper))
+        yield
+
+
+def view_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name.replace("\\", "").replace('"', "")
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "METRICS_SAMPLE_RATE", 1.0)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timer = QueryCounter()
+        start = time.perf_counter()
+        with wrap_connections(timer):
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, timer)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(
+            request, response, time.perf_counter() - start, QueryCounter()
+        )
+        return response
+
+    @staticmethod
+    def record(request, response, duration, timer):
+        registry.record_request(
+            view=view_name(request),
+            method=request.method,
+            status_code=response.status_code,
+            duration=duration,
+            queries=timer.count,
+            query_duration=timer.duration,
+            response_bytes=(
+                0 if response.streaming else len(response.content)
+            ),
+        )
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, for METRICS_ALLOWED_IPS and staff."""
+    allowed_ips = getattr(settings, "METRICS_ALLOWED_IPS", [])
+    user = getattr(request, "user", None)
+    if request.META.get("REMOTE_ADDR") not in allowed_ips and not (
+        user is not None and user.is_staff
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4"
+    )
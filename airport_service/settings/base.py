@@ -32,6 +32,31 @@ INTERNAL_IPS = [
     "127.0.0.1",
 ]
 
+# Request metrics served at /metrics/ in the Prometheus text format to
+# staff and to the comma separated METRICS_ALLOWED_IPS, e.g. the address
+# of the scraper or of the proxy in front of the app
+METRICS_SAMPLE_RATE = float(os.environ.get("METRICS_SAMPLE_RATE", "1.0"))
+METRICS_ALLOWED_IPS = [
+    ip.strip()
+    for ip in os.environ.get(
+        "METRICS_ALLOWED_IPS", ",".join(INTERNAL_IPS)
+    ).split(",")
+    if ip.strip()
+]
+
+# Sampled log of queries slower than the threshold, see
+# airport_service/slow_queries.py
+SLOW_QUERY_THRESHOLD_MS = float(
+    os.environ.get("SLOW_QUERY_THRESHOLD_MS", "100")
+)
+SLOW_QUERY_SAMPLE_RATE = float(
+    os.environ.get("SLOW_QUERY_SAMPLE_RATE", "1.0")
+)
+SLOW_QUERY_STACK_DEPTH = 8
+SLOW_QUERY_LOG_FILE = os.environ.get(
+    "SLOW_QUERY_LOG_FILE", str(BASE_DIR / "slow_queries.log")
+)
+
 # Assets Management
 ASSETS_ROOT = "/static/assets"
 
@@ -48,18 +73,20 @@ INSTALLED_APPS = [
     "rest_framework.authtoken",
     'user',
     "airport",
-    "debug_toolbar",
     "drf_spectacular",
     "django_extensions",
 ]
 
 MIDDLEWARE = [
+    "airport_service.metrics.MetricsMiddleware",
+    "airport_service.slow_queries.SlowQueryMiddleware",
+    "airport_service.db_router.ReplicaRoutingMiddleware",
     'django.middleware.security.SecurityMiddleware',
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    "airport.validation.ValidationScopeMiddleware",
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,6 +111,77 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'airport_service.wsgi.application'
 
+# Reads of safe requests go to the DATABASE_REPLICAS aliases, see
+# airport_service/db_router.py. Users stay on the primary for
+# REPLICA_PIN_SECONDS after a write.
+DATABASE_ROUTERS = ["airport_service.db_router.ReplicaRouter"]
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", "5"))
+REPLICA_MAX_LAG_SECONDS = float(
+    os.environ.get("REPLICA_MAX_LAG_SECONDS", "5")
+)
+REPLICA_HEALTH_CHECK_INTERVAL = 5
+# Cache holding the pins, it must be shared by all workers
+REPLICA_PIN_CACHE_ALIAS = "replica_pins"
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "replica_pins": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "replica_pins",
+    },
+}
+
+# Cache used for reference data list responses (airports, routes, ...)
+AIRPORT_CACHE_ALIAS = "default"
+AIRPORT_CACHE_TIMEOUT = 300
+
+# Seconds after which the itinerary search index is rebuilt even when
+# the Route list version did not change, see airport/itinerary.py
+ITINERARY_RELOAD_SECONDS = 60
+
+# Cache holding the throttle counters, it must be shared by all workers
+THROTTLE_CACHE_ALIAS = "default"
+
+# Minutes seats stay held by POST /api/airport/holds/ before being released
+SEAT_HOLD_MINUTES = 10
+SEAT_HOLD_MAX_MINUTES = 30
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "slow_queries": {
+            "format": "%(asctime)s %(process)d %(message)s",
+        },
+    },
+    "handlers": {
+        "slow_queries": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": SLOW_QUERY_LOG_FILE,
+            "maxBytes": 10 * 1024 * 1024,
+            "backupCount": 5,
+            "delay": True,
+            "formatter": "slow_queries",
+        },
+    },
+    "loggers": {
+        "airport.slow_queries": {
+            "handlers": ["slow_queries"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
+# Threads for blocking calls made by the async views in airport.async_views
+ASYNC_BLOCKING_WORKERS = int(os.environ.get("ASYNC_BLOCKING_WORKERS", "8"))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -134,20 +232,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "airport.permissions.IsAdminOrIfAuthenticatedReadOnly",
     ),
 
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "airport.pagination.DefaultCursorPagination",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle"
+        "airport_service.throttling.AnonRateThrottle",
+        "airport_service.throttling.UserRateThrottle",
+        "airport_service.throttling.ScopedRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "10/min",
-        "user": "30/min"
+        "user": "30/min",
+        "orders": "10/min",
+        "flights": "120/min",
     }
 
 }
@@ -168,4 +270,21 @@ SPECTACULAR_SETTINGS = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'TOKEN_OBTAIN_SERIALIZER': (
+        'user.serializers.ClaimsTokenObtainPairSerializer'
+    ),
+    'TOKEN_REFRESH_SERIALIZER': (
+        'user.serializers.ClaimsTokenRefreshSerializer'
+    ),
 }
+
+# Processes hashing passwords for user.hashing, 0 hashes on the request
+# thread. Beyond PASSWORD_HASHING_QUEUE waiting hashes logins get a 429.
+PASSWORD_HASHING_WORKERS = int(
+    os.environ.get("PASSWORD_HASHING_WORKERS", "0")
+)
+PASSWORD_HASHING_QUEUE = int(os.environ.get("PASSWORD_HASHING_QUEUE", "16"))
+
+# Seconds users loaded by user.authentication stay cached per process
+USER_CACHE_SECONDS = 30
+USER_CACHE_SIZE = 10000
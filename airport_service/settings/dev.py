@@ -6,6 +6,15 @@ DEBUG = os.environ.get("DJANGO_DEBUG", "") != 'False'
 
 ALLOWED_HOSTS = []
 
+INSTALLED_APPS = INSTALLED_APPS + ["debug_toolbar"]
+
+_toolbar_position = MIDDLEWARE.index(
+    "django.middleware.security.SecurityMiddleware"
+) + 1
+MIDDLEWARE = MIDDLEWARE[:_toolbar_position] + [
+    "debug_toolbar.middleware.DebugToolbarMiddleware",
+] + MIDDLEWARE[_toolbar_position:]
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
@@ -13,5 +22,19 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    }
+}
+# A copy of db.sqlite3 can serve as a local read replica to try the
+# routing, e.g. DJANGO_SQLITE_REPLICA=replica.sqlite3
+if os.environ.get("DJANGO_SQLITE_REPLICA"):
+    DATABASES["replica"] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / os.environ["DJANGO_SQLITE_REPLICA"],
+        'TEST': {
+            'MIRROR': 'default',
+        },
     }
-}
\ No newline at end of file
+    DATABASE_REPLICAS = ["replica"]
@@ -6,6 +6,10 @@ DEBUG = False
 
 ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
 
+PASSWORD_HASHING_WORKERS = int(
+    os.environ.get("PASSWORD_HASHING_WORKERS", os.cpu_count() or 1)
+)
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
@@ -18,4 +22,42 @@ DATABASES = {
         "HOST": os.environ["POSTGRES_HOST"],
         "PORT": int(os.environ["POSTGRES_PORT"])
     }
-}
\ No newline at end of file
+}
+# Read replicas, configured with POSTGRES_REPLICA_HOSTS=host[:port],...
+for number, replica in enumerate(
+    filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(","))
+):
+    host, _, port = replica.strip().partition(":")
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": int(port or DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{number}")
+
+# Cache shared by all workers, so cached lists and their versions are
+# the same whichever worker serves the request
+CACHES["default"] = {
+    "BACKEND": "django.core.cache.backends.redis.RedisCache",
+    "LOCATION": os.environ.get("REDIS_URL", "redis://redis:6379/0"),
+}
+
+# Read-your-writes pins shared by all workers, see
+# airport_service/db_router.py
+CACHES["replica_pins"] = {
+    "BACKEND": "django.core.cache.backends.redis.RedisCache",
+    "LOCATION": os.environ.get(
+        "REPLICA_PIN_REDIS_URL", CACHES["default"]["LOCATION"]
+    ),
+    "KEY_PREFIX": "replica_pins",
+}
+
+# Throttle counters shared by all workers, e.g.
+# THROTTLE_REDIS_URL=redis://redis:6379/1
+if os.environ.get("THROTTLE_REDIS_URL"):
+    CACHES["throttle"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["THROTTLE_REDIS_URL"],
+    }
+    THROTTLE_CACHE_ALIAS = "throttle"
@@ -0,0 +1,95 @@
+"""
+Sampled log of slow database queries.
+
+SlowQueryMiddleware wraps every request in an execute-wrapper on the
+connections of all database aliases.
+Queries slower than SLOW_QUERY_THRESHOLD_MS are sampled with
+SLOW_QUERY_SAMPLE_RATE and logged to the "airport.slow_queries" logger
+with their SQL, duration, view name and the project frames of the stack
+that issued them. Fast queries only cost a perf_counter() call.
+Async requests pass through untouched, their queries run in other threads
+than the wrapped connections.
+"""
+import logging
+import random
+import time
+import traceback
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from airport_service.metrics import view_name, wrap_connections
+
+logger = logging.getLogger("airport.slow_queries")
+
+SQL_MAX_LENGTH = 2000
+
+
+def project_stack(limit: int) -> list:
+    """Return the innermost ``limit`` stack frames of the project code."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and "site-packages" not in frame.filename
+        and frame.filename != __file__
+    ]
+    return [
+        f"{frame.filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}"
+        for frame in frames[-limit:]
+    ]
+
+
+class SlowQueryLogger:
+    def __init__(self, request):
+        self.request = request
+        self.threshold = getattr(settings, "SLOW_QUERY_THRESHOLD_MS", 100)
+        self.sample_rate = getattr(settings, "SLOW_QUERY_SAMPLE_RATE", 1.0)
+        self.stack_depth = getattr(settings, "SLOW_QUERY_STACK_DEPTH", 8)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            if (
+                duration >= self.threshold
+                and random.random() < self.sample_rate
+            ):
+                self.log(sql, duration)
+
+    def log(self, sql, duration):
+        view = view_name(self.request)
+        stack = project_stack(self.stack_depth)
+        logger.warning(
+            "%.1f ms %s %s %s\n%s",
+            duration,
+            self.request.method,
+            view,
+            sql[:SQL_MAX_LENGTH],
+            "\n".join(f"    {frame}" for frame in stack),
+            extra={
+                "duration_ms": duration,
+                "view": view,
+                "sql": sql,
+                "stack": stack,
+            },
+        )
+
+
+class SlowQueryMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+        with wrap_connections(SlowQueryLogger(request)):
+            return self.get_response(request)
@@ -0,0 +1,94 @@
+"""
+Sliding window counter throttles.
+
+DRF's throttles keep the timestamp of every request in the window under
+one cache key and rewrite the whole list on each request. These keep two
+integers per client instead, the request counts of the current and the
+previous fixed window, and estimate the sliding window as
+
+    previous * (1 - elapsed part of the current window) + current
+
+Counts change only through cache add() and incr(), which are atomic in
+Redis and Memcached, so the limits hold across workers sharing the cache
+THROTTLE_CACHE_ALIAS points to.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import throttling
+
+
+def get_cache():
+    return caches[getattr(settings, "THROTTLE_CACHE_ALIAS", "default")]
+
+
+class SlidingWindowRateThrottle(throttling.SimpleRateThrottle):
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        cache = get_cache()
+        self.now = self.timer()
+        window, offset = divmod(self.now, self.duration)
+        current_key = f"{self.key}:{int(window)}"
+        previous_key = f"{self.key}:{int(window) - 1}"
+        counts = cache.get_many([previous_key, current_key])
+        self.previous = counts.get(previous_key, 0)
+        self.current = counts.get(current_key, 0)
+        self.weight = 1 - offset / self.duration
+        if self.estimate() + 1 > self.num_requests:
+            return self.throttle_failure()
+
+        # The current window's count lives on as the previous one.
+        cache.add(current_key, 0, self.duration * 2)
+        try:
+            self.current = cache.incr(current_key)
+        except ValueError:
+            cache.set(current_key, 1, self.duration * 2)
+            self.current = 1
+        if self.estimate() > self.num_requests:
+            # Other workers took the last requests in the meantime.
+            cache.decr(current_key)
+            self.current -= 1
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def estimate(self) -> float:
+        return self.previous * self.weight + self.current
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        """Seconds until the estimate leaves room for a request again."""
+        remaining = self.weight * self.duration
+        if self.current < self.num_requests:
+            if not self.previous:
+                return 0
+            share = (self.num_requests - 1 - self.current) / self.previous
+            return max(remaining - share * self.duration, 0)
+        # Only once the current window becomes the previous one.
+        return remaining + (
+            1 - (self.num_requests - 1) / self.current
+        ) * self.duration
+
+
+class AnonRateThrottle(
+    throttling.AnonRateThrottle, SlidingWindowRateThrottle
+):
+    pass
+
+
+class UserRateThrottle(
+    throttling.UserRateThrottle, SlidingWindowRateThrottle
+):
+    pass
+
+
+class ScopedRateThrottle(
+    throttling.ScopedRateThrottle, SlidingWindowRateThrottle
+):
+    """Limits views by their ``throttle_scope``, on top of the other
+    throttles."""
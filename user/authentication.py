@@ -0,0 +1,133 @@
+"""
+JWT authentication without a user query per request.
+
+Tokens carry the user's email and is_staff claims, set when they are
+obtained and read again from the database when they are refreshed (see
+user.serializers). Safe-method requests get a user built from these
+claims. Other requests, and tokens issued before the user was last
+changed in this process, load the user through a short-lived in-process
+cache of USER_CACHE_SECONDS. Saving or deleting a user drops its cache
+entry. The claims are stamped with the time they were read (claims_at,
+with sub-second precision unlike iat), so a token issued right after a
+save in the same second, as on a login that upgrades the password hash,
+still uses its claims.
+
+Both the cache and the change times are kept per process: a user
+deactivated or demoted through another worker keeps their access on this
+one until their access token expires, or for USER_CACHE_SECONDS for
+unsafe requests. Views setting ``fresh_user = True``, like the staff-only
+exports, load the user from the database on every request instead.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+CLAIMS = ("email", "is_staff")
+CLAIMS_AT = "claims_at"
+
+
+class UserCache:
+    """Users by id, kept for USER_CACHE_SECONDS."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.users = OrderedDict()
+        self.changed_at = {}
+
+    def get(self, user_id):
+        with self.lock:
+            cached = self.users.get(user_id)
+            if cached is None:
+                return None
+            if cached[0] <= time.monotonic():
+                del self.users[user_id]
+                return None
+            return cached[1]
+
+    def set(self, user) -> None:
+        timeout = getattr(settings, "USER_CACHE_SECONDS", 30)
+        size = getattr(settings, "USER_CACHE_SIZE", 10000)
+        with self.lock:
+            self.users[user.pk] = (time.monotonic() + timeout, user)
+            self.users.move_to_end(user.pk)
+            while len(self.users) > size:
+                self.users.popitem(last=False)
+
+    def invalidate(self, user_id) -> None:
+        now = time.time()
+        with self.lock:
+            self.users.pop(user_id, None)
+            self.changed_at[user_id] = now
+            # Tokens older than the access token lifetime have expired.
+            oldest = now - api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+            for changed_id, changed in list(self.changed_at.items()):
+                if changed < oldest:
+                    del self.changed_at[changed_id]
+
+    def claims_are_current(self, user_id, claims_at) -> bool:
+        return claims_at > self.changed_at.get(user_id, 0)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.users.clear()
+            self.changed_at.clear()
+
+
+user_cache = UserCache()
+
+
+def set_claims(token, user) -> None:
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[CLAIMS_AT] = time.time()
+
+
+def claims_user(validated_token):
+    """Build the token's user from its claims, or return None if the
+    token has no claims or predates a change of the user."""
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        claims = {claim: validated_token[claim] for claim in CLAIMS}
+        claims_at = validated_token[CLAIMS_AT]
+    except KeyError:
+        return None
+    if not user_cache.claims_are_current(user_id, claims_at):
+        return None
+    user = get_user_model()(
+        **{api_settings.USER_ID_FIELD: user_id}, is_active=True, **claims
+    )
+    user._state.adding = False
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        view = (request.parser_context or {}).get("view")
+        self.fresh = getattr(view, "fresh_user", False)
+        self.safe = request.method in SAFE_METHODS and not self.fresh
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if getattr(self, "fresh", False):
+            return super().get_user(validated_token)
+        if getattr(self, "safe", False):
+            user = claims_user(validated_token)
+            if user is not None:
+                return user
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            return super().get_user(validated_token)
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user)
+        # Views may change the user they are given, the cache keeps its own.
+        return copy.copy(user)
@@ -0,0 +1,107 @@
+"""
+Password hashing in a bounded process pool.
+
+PBKDF2 keeps a CPU busy for the whole hash, so logins and registrations
+hash in PASSWORD_HASHING_WORKERS processes instead of on the request
+thread. At most PASSWORD_HASHING_QUEUE more hashes wait for a worker;
+beyond that the request fails with 429 Too Many Requests rather than
+piling up behind the others. With no workers passwords are hashed
+inline, as Django does.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework.exceptions import Throttled
+
+
+def _setup():
+    django.setup()
+
+
+def _verify(password, encoded):
+    """Return whether the password matches and whether the hash must be
+    upgraded."""
+    upgrade = []
+    correct = hashers.check_password(password, encoded, upgrade.append)
+    return correct, bool(upgrade)
+
+
+class HashingPool:
+    def __init__(self, workers, queue) -> None:
+        self.workers = workers
+        self.queue = queue
+        self.slots = threading.BoundedSemaphore(workers + queue)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_setup,
+        ) if workers else None
+
+    def run(self, func, *args):
+        if self.executor is None:
+            return func(*args)
+        if not self.slots.acquire(blocking=False):
+            raise Throttled(
+                wait=1, detail="Too many logins in progress, try again."
+            )
+        try:
+            return self.executor.submit(func, *args).result()
+        finally:
+            self.slots.release()
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> HashingPool:
+    """Return the pool, started on first use and whenever its settings
+    changed."""
+    global _pool
+    workers = getattr(settings, "PASSWORD_HASHING_WORKERS", 0)
+    queue = getattr(settings, "PASSWORD_HASHING_QUEUE", 16)
+    with _pool_lock:
+        if _pool is None or (_pool.workers, _pool.queue) != (workers, queue):
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = HashingPool(workers, queue)
+        return _pool
+
+
+def _run(func, *args):
+    pool = get_pool()
+    try:
+        return pool.run(func, *args)
+    except BrokenProcessPool:
+        # A worker died, the next call starts a fresh pool.
+        global _pool
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        raise
+
+
+def make_password(password) -> str:
+    if password is None:
+        return hashers.make_password(None)
+    return _run(hashers.make_password, password)
+
+
+def check_password(password, encoded, setter=None) -> bool:
+    """Like django.contrib.auth.hashers.check_password, hashed in the
+    pool."""
+    if password is None or not hashers.is_password_usable(encoded):
+        return False
+    correct, must_update = _run(_verify, password, encoded)
+    if setter and correct and must_update:
+        setter(password)
+    return correct
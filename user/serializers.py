@@ -1,6 +1,15 @@
 from django.contrib.auth import get_user_model, authenticate
 from rest_framework import serializers
 from django.utils.translation import gettext as _
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.authentication import set_claims
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -53,3 +62,28 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs["user"] = user
         return attrs
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        """Add the claims ClaimsJWTAuthentication builds users from"""
+        token = super().get_token(user)
+        set_claims(token, user)
+        return token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        """Issue the access token with the user's current claims"""
+        data = super().validate(attrs)
+        access = AccessToken(data["access"])
+        user = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: access[api_settings.USER_ID_CLAIM]},
+            is_active=True,
+        ).first()
+        if user is None:
+            raise InvalidToken(_("User not found or inactive."))
+        set_claims(access, user)
+        data["access"] = str(access)
+        return data
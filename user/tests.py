@@ -1,3 +1,169 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from user import hashing
+
+CREATE_USER_URL = reverse("user:create")
+TOKEN_URL = reverse("user:token_obtain_pair")
+TOKEN_REFRESH_URL = reverse("user:token_refresh")
+ME_URL = reverse("user:manage")
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@admin.com",
+            password="testpassword",
+            is_staff=True,
+        )
+
+    def obtain_tokens(self) -> dict:
+        res = self.client.post(
+            TOKEN_URL, {"email": "admin@admin.com", "password": "testpassword"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def authorize(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_token_carries_claims(self):
+        access = AccessToken(self.obtain_tokens()["access"])
+        self.assertEqual(access["email"], "admin@admin.com")
+        self.assertTrue(access["is_staff"])
+
+    def test_safe_request_is_authenticated_from_claims(self):
+        self.authorize(self.obtain_tokens()["access"])
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["id"], self.user.id)
+        self.assertEqual(res.data["email"], "admin@admin.com")
+        self.assertTrue(res.data["is_staff"])
+
+    def test_login_right_after_a_save_uses_claims(self):
+        # setUp has just saved the user, logging in may upgrade its hash.
+        self.authorize(self.obtain_tokens()["access"])
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_user_without_claims_is_cached(self):
+        self.authorize(AccessToken.for_user(self.user))
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.data["email"], "admin@admin.com")
+
+    def test_updated_user_is_not_served_from_stale_claims(self):
+        self.authorize(self.obtain_tokens()["access"])
+        res = self.client.patch(ME_URL, {"email": "staff@admin.com"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data["email"], "staff@admin.com")
+
+    def test_deleted_user_is_not_served_from_cache(self):
+        self.authorize(AccessToken.for_user(self.user))
+        self.client.get(ME_URL)
+        self.user.delete()
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_staff_only_view_loads_the_user(self):
+        self.authorize(self.obtain_tokens()["access"])
+        url = reverse(
+            "airport:export",
+            kwargs={"dataset": "orders", "export_format": "csv"},
+        )
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Demoted through another worker, without this process noticing.
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_staff=False
+        )
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_refresh_reads_current_claims(self):
+        refresh = self.obtain_tokens()["refresh"]
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_staff=False
+        )
+        res = self.client.post(TOKEN_REFRESH_URL, {"refresh": refresh})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(AccessToken(res.data["access"])["is_staff"])
+
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False
+        )
+        res = self.client.post(TOKEN_REFRESH_URL, {"refresh": refresh})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def tearDown(self):
+        # Shuts down a process pool started with overridden settings.
+        hashing.get_pool()
+
+    def login(self, email="user@user.com", password="testpassword"):
+        return self.client.post(
+            TOKEN_URL, {"email": email, "password": password}
+        )
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1)
+    def test_register_and_login_hash_in_the_pool(self):
+        res = self.client.post(
+            CREATE_USER_URL,
+            {"email": "user@user.com", "password": "testpassword"},
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIsNotNone(hashing.get_pool().executor)
+        user = get_user_model().objects.get(email="user@user.com")
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$"))
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.login(password="wrong").status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE=0)
+    def test_saturated_pool_responds_429(self):
+        get_user_model().objects.create_user(
+            email="user@user.com", password="testpassword"
+        )
+        slots = hashing.get_pool().slots
+        self.assertTrue(slots.acquire(blocking=False))
+        try:
+            res = self.login()
+        finally:
+            slots.release()
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+    def test_login_upgrades_outdated_hash(self):
+        user = get_user_model().objects.create_user(email="user@user.com")
+        user.password = PBKDF2PasswordHasher().encode(
+            "testpassword", "outdatedsalt", iterations=1000
+        )
+        user.save()
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith(
+            f"pbkdf2_sha256${PBKDF2PasswordHasher.iterations}$"
+        ))
+        self.assertTrue(user.check_password("testpassword"))